@@ -0,0 +1,50 @@
+import time
+from typing import Dict
+from fastapi import APIRouter, Request
+from app.core.logging_config import logger
+from app.core import metrics
+
+class RequestMetrics:
+    """
+    HTTP middleware that logs each request, records its count and latency per
+    route template and, when requested, adds a Server-Timing stage breakdown.
+    """
+    def __init__(self, timing_headers: bool = False):
+        # Always send Server-Timing; otherwise only for "X-Request-Timing: 1"
+        self.timing_headers = timing_headers
+        # id(route) -> prefix of the router it was included under
+        self._route_prefixes: Dict[int, str] = {}
+
+    def include_router(self, router: APIRouter, prefix: str):
+        """
+        Records the prefix a router is mounted under; its routes only know their relative path.
+        """
+        for route in router.routes:
+            self._route_prefixes[id(route)] = prefix
+
+    def route_template(self, request: Request) -> str:
+        # The route template (not the URL) keeps label cardinality bounded
+        route = request.scope.get("route")
+        path = getattr(route, "path", None)
+        if path is None:
+            return "unmatched"
+        return self._route_prefixes.get(id(route), "") + path
+
+    async def __call__(self, request: Request, call_next):
+        logger.info(f"Incoming: {request.method} {request.url.path}")
+        start = time.perf_counter()
+        timings = None
+        if self.timing_headers or request.headers.get("x-request-timing"):
+            timings = metrics.start_request_timings()
+
+        response = await call_next(request)
+
+        elapsed = time.perf_counter() - start
+        path = self.route_template(request)
+        metrics.HTTP_LATENCY.observe(elapsed, method=request.method, path=path)
+        metrics.HTTP_REQUESTS.inc(method=request.method, path=path, status=response.status_code)
+        if timings is not None:
+            response.headers["Server-Timing"] = metrics.format_server_timing(timings, elapsed)
+
+        logger.info(f"Final Status: {response.status_code}")
+        return response
@@ -1,17 +1,21 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException
+from fastapi.responses import Response
 from pydantic import BaseModel
 from typing import List, Optional, Dict, Any
-import shutil
 import os
 import uuid
+import json
 
 # Import core modules
 from app.core.parsing import DocumentParser
-from app.core.chunking import ContentChunker
+from app.core.chunking import ContentChunker, diff_chunks
 from app.core.embedding import EmbeddingModel
-from app.core.vector_store import VectorStore
-from app.core.extraction import DataExtractor
+from app.core.vector_store import VectorStore, SharedVectorStore
+from app.core.shared_state import open_state_db, SQLiteDocumentStore
+from app.core.answer_cache import SemanticAnswerCache
+from app.core.extraction import DataExtractor, merge_partial_extraction
 from app.core.rag import RAGEngine
+from app.core import metrics
 
 router = APIRouter()
 
@@ -19,13 +23,42 @@ router = APIRouter()
 parser = DocumentParser()
 chunker = ContentChunker()
 embedder = EmbeddingModel()
-vector_store = VectorStore()
 extractor = DataExtractor()
 rag_engine = RAGEngine()
 
-# In-memory document storage for parsed objects (needed for table extraction)
-# In production, this would be a database or object store
-document_store = {}
+# With STATE_DIR set, documents and the vector index are shared through SQLite (WAL)
+# and on-disk FAISS index shards, so the API can run under `uvicorn --workers N`.
+# Otherwise state is in-process (single worker only).
+STATE_DIR = os.getenv("STATE_DIR")
+if STATE_DIR:
+    os.makedirs(STATE_DIR, exist_ok=True)
+    state_db_path = os.path.join(STATE_DIR, "state.db")
+    vector_store = SharedVectorStore(open_state_db(state_db_path), STATE_DIR)
+    document_store = SQLiteDocumentStore(open_state_db(state_db_path))
+else:
+    vector_store = VectorStore()
+    # In-memory document storage for parsed objects (needed for table extraction)
+    document_store = {}
+
+# Per-document semantic cache of /ask answers (per worker)
+ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+answer_cache = SemanticAnswerCache(
+    threshold=float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.92")),
+    max_entries_per_document=int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "128")),
+    max_documents=int(os.getenv("ANSWER_CACHE_MAX_DOCUMENTS", "256"))
+)
+
+metrics.registry.gauge("ultra_doc_index_vectors", "Vectors in the FAISS index", lambda: vector_store.ntotal)
+metrics.registry.gauge("ultra_doc_documents", "Documents held in the document store", lambda: len(document_store))
+
+def _save_document(document_id: str, record: Dict[str, Any]):
+    """
+    Writes a document record with a bumped revision and drops cached answers for it.
+    """
+    previous = document_store.get(document_id)
+    record["revision"] = (previous or {}).get("revision", 0) + 1
+    document_store[document_id] = record
+    answer_cache.invalidate(document_id)
 
 class AskRequest(BaseModel):
     question: str
@@ -34,23 +67,94 @@ class AskRequest(BaseModel):
 class ExtractionRequest(BaseModel):
     document_id: str
     schema_definition: Optional[Dict[str, Any]] = None
+    page: Optional[int] = None
+    table_index: Optional[int] = None
+
+def _reingest_document(document_id: str, parsed_doc, chunks: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Applies a revised upload to an existing document: only chunks whose hash
+    changed are re-embedded and replaced in the vector store, and structured
+    extraction re-runs on the affected pages only.
+    """
+    existing = vector_store.document_chunks(document_id)
+    new_chunks, remove_ids = diff_chunks(existing, chunks)
+
+    affected_pages = sorted(
+        {c["page_number"] for c in new_chunks} | {existing[i]["page_number"] for i in remove_ids}
+    )
+
+    if remove_ids or new_chunks:
+        embeddings = embedder.embed([c["text"] for c in new_chunks]) if new_chunks else None
+        vector_store.replace_chunks(remove_ids, embeddings, new_chunks)
+
+    previous = document_store[document_id]
+    proposed_schema = previous.get("proposed_schema")
+    extraction_results = dict(previous.get("extraction_results") or {})
+    if affected_pages and proposed_schema and "error" not in proposed_schema:
+        pages = set(affected_pages)
+        page_text = ""
+        unchanged_text = ""
+        for item, level in parsed_doc.iterate_items():
+            if item.text:
+                if item.page_no in pages:
+                    page_text += item.text + "\n"
+                else:
+                    unchanged_text += item.text + "\n"
+        changed_text = ""
+        if previous.get("parsed_doc") is not None:
+            for item, level in previous["parsed_doc"].iterate_items():
+                if item.text and item.page_no in pages:
+                    changed_text += item.text + "\n"
+        updates = extractor.extract_structured_data(page_text[:30000], proposed_schema)
+        # Fields sourced from changed/removed text are overwritten or cleared, not left stale
+        extraction_results = merge_partial_extraction(extraction_results, updates, changed_text, unchanged_text)
+
+    # An identical revision keeps the stored record, its revision and cached answers
+    if remove_ids or new_chunks:
+        _save_document(document_id, {
+            "parsed_doc": parsed_doc,
+            "extraction_results": extraction_results,
+            "proposed_schema": proposed_schema
+        })
+
+    return {
+        "document_id": document_id,
+        "message": "Document revision processed successfully",
+        "chunks_count": len(chunks),
+        "chunks": chunks,
+        "proposed_schema": proposed_schema,
+        "extraction": {
+            "tables": parsed_doc.tables.get_tables(),
+            "structured_data": extraction_results
+        },
+        "reingestion": {
+            "chunks_added": len(new_chunks),
+            "chunks_removed": len(remove_ids),
+            "chunks_unchanged": len(chunks) - len(new_chunks),
+            "affected_pages": affected_pages
+        }
+    }
 
+# Handlers are plain `def`: parsing, embedding and LLM calls block, so FastAPI
+# runs them in its threadpool instead of on the event loop.
 @router.post("/upload")
-async def upload_document(file: UploadFile = File(...)):
+def upload_document(file: UploadFile = File(...), document_id: Optional[str] = Form(None)):
+    # document_id marks the upload as a new version of an existing document
+    if document_id is not None and document_id not in document_store:
+        raise HTTPException(status_code=404, detail="Document not found")
+    file_id = document_id or str(uuid.uuid4())
     try:
-        # Save file temporarily
-        file_id = str(uuid.uuid4())
-        file_ext = os.path.splitext(file.filename)[1]
-        temp_path = f"temp_{file_id}{file_ext}"
-        
-        with open(temp_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-            
-        # 1. Parse
-        parsed_doc = parser.parse(temp_path)
+        # 1. Parse straight from the multipart spool (no extra copy)
+        file.file.seek(0)
+        parsed_doc = parser.parse(file.file, filename=file.filename or "")
         
         # 2. Chunk
         chunks = chunker.chunk(parsed_doc)
+
+        if document_id is not None:
+            for chunk in chunks:
+                chunk["document_id"] = file_id
+            return _reingest_document(file_id, parsed_doc, chunks)
         
         # 3. Embed
         texts = [chunk["text"] for chunk in chunks]
@@ -65,11 +169,11 @@ async def upload_document(file: UploadFile = File(...)):
         vector_store.add_documents(embeddings, chunks)
         
         # Store parsed document and extraction results
-        document_store[file_id] = {
+        _save_document(file_id, {
             "parsed_doc": parsed_doc,
             "extraction_results": None, # Will update below
             "proposed_schema": None
-        }
+        })
         
         # 5. AUTOMATION: Propose Schema & Extract
         # Aggregate text for LLM
@@ -86,22 +190,16 @@ async def upload_document(file: UploadFile = File(...)):
         if proposed_schema and "error" not in proposed_schema:
             extraction_results = extractor.extract_structured_data(full_text[:30000], proposed_schema)
 
-        # Extraction Tables (Deterministic)
-        tables = extractor.extract_table_data(parsed_doc)
-        serialized_tables = []
-        for tbl in tables:
-            serialized_tables.append({
-                "page": tbl["page_number"],
-                "data": tbl["dataframe"].to_dict(orient="records")
-            })
+        # Extraction Tables (Deterministic, pre-built at parse time)
+        serialized_tables = parsed_doc.tables.get_tables()
 
-        # Store results
-        document_store[file_id]["extraction_results"] = extraction_results
-        document_store[file_id]["proposed_schema"] = proposed_schema
+        # Store results (reassign the record so shared stores persist it)
+        _save_document(file_id, {
+            "parsed_doc": parsed_doc,
+            "extraction_results": extraction_results,
+            "proposed_schema": proposed_schema
+        })
 
-        # Cleanup
-        os.remove(temp_path)
-        
         return {
             "document_id": file_id, 
             "message": "Document uploaded and processed successfully",
@@ -115,12 +213,10 @@ async def upload_document(file: UploadFile = File(...)):
         }
         
     except Exception as e:
-        if os.path.exists(temp_path):
-            os.remove(temp_path)
         raise HTTPException(status_code=500, detail=f"Processing failed: {str(e)}")
 
 @router.post("/ask")
-async def ask_question(request: AskRequest):
+def ask_question(request: AskRequest):
     try:
         # 1. Embed question 
         # Note: BGE-small requires instruction for queries? 
@@ -131,6 +227,9 @@ async def ask_question(request: AskRequest):
         # Keeping it simple for now, can refine if retrieval is poor.
         
         q_embedding = embedder.embed([request.question])
+        q_vector = q_embedding.flatten()
+        doc_data = document_store.get(request.document_id)
+        revision = doc_data.get("revision") if doc_data else None
         
         # 2. Search
         # We assume one document for now, or we filter by document_id if we supported multiple.
@@ -139,7 +238,7 @@ async def ask_question(request: AskRequest):
         # Let's filter manually in search results if needed, or rely on the user only uploading one doc for the demo.
         # PRD says "Single-document scope only". 
         
-        results = vector_store.search(q_embedding.flatten(), k=5)
+        results = vector_store.search(q_vector, k=5)
         
         # Filter by document_id if we have multiple in store (good practice)
         doc_results = [r for r in results if r['metadata'].get('document_id') == request.document_id]
@@ -148,7 +247,6 @@ async def ask_question(request: AskRequest):
              return {"answer": "I'm sorry, I cannot find sufficient information in the document to answer that accurately.", "sources": []}
 
         # 3. Intelligent Mapping (Query to Schema)
-        doc_data = document_store.get(request.document_id)
         structured_context = ""
         mappings = []
         schema_score = 0.0
@@ -180,6 +278,18 @@ async def ask_question(request: AskRequest):
                     for m in mappings:
                         structured_context += f"- {m['field']}: {doc_data['extraction_results'].get(m['field'])} (Score: {m['confidence']:.2f})\n"
 
+        # Semantic cache: reuse the answer to a near-identical earlier question, but only
+        # if it retrieved the same chunks and mapped to the same top schema field
+        # (questions differing in one field, e.g. pickup vs delivery date, embed closely)
+        cache_context = (
+            tuple(sorted(r["metadata"].get("chunk_hash") or r["metadata"].get("text", "") for r in doc_results)),
+            mappings[0]["field"] if mappings else None
+        )
+        if ANSWER_CACHE_ENABLED:
+            cached = answer_cache.lookup(request.document_id, revision, q_vector, cache_context)
+            if cached is not None:
+                return cached
+
         # 4. Final Confidence Calculation
         # Semantic Score from Vector results
         semantic_score = doc_results[0]["score"] if doc_results else 0.0
@@ -214,6 +324,9 @@ async def ask_question(request: AskRequest):
             "final_confidence": float(final_confidence),
             "status": "accepted"
         }
+
+        if ANSWER_CACHE_ENABLED and not response.get("error"):
+            answer_cache.store(request.document_id, revision, request.question, q_vector, response, cache_context)
         
         return response
         
@@ -221,7 +334,7 @@ async def ask_question(request: AskRequest):
         raise HTTPException(status_code=500, detail=f"Error answering question: {str(e)}")
 
 @router.post("/extract")
-async def extract_structured_data(request: ExtractionRequest):
+def extract_structured_data(request: ExtractionRequest):
     try:
         doc_id = request.document_id
         if doc_id not in document_store:
@@ -230,8 +343,16 @@ async def extract_structured_data(request: ExtractionRequest):
         doc_data = document_store[doc_id]
         parsed_doc = doc_data["parsed_doc"] if isinstance(doc_data, dict) else doc_data
         
-        # 1. Table Extraction (Deterministic)
-        tables = extractor.extract_table_data(parsed_doc)
+        # 1. Table Extraction (Deterministic, served from the columnar table store)
+        table_store = parsed_doc.tables
+        if request.table_index is not None:
+            if not 0 <= request.table_index < len(table_store):
+                raise HTTPException(status_code=404, detail="Table not found")
+            tables_json = json.dumps([table_store.get_table(request.table_index)])
+        elif request.page is not None:
+            tables_json = json.dumps(table_store.get_tables(page=request.page))
+        else:
+            tables_json = table_store.to_json()
         
         # 2. Schema Extraction (LLM)
         structured_data = {}
@@ -244,24 +365,17 @@ async def extract_structured_data(request: ExtractionRequest):
                      
             structured_data = extractor.extract_structured_data(full_text[:30000], request.schema_definition)
 
-        # Serialize DataFrames for JSON response
-        serialized_tables = []
-        for tbl in tables:
-            serialized_tables.append({
-                "page": tbl["page_number"],
-                "data": tbl["dataframe"].to_dict(orient="records")
-            })
-
-        return {
-            "tables": serialized_tables,
-            "structured_data": structured_data
-        }
+        # Splice the cached table JSON into the response instead of re-encoding it
+        body = f'{{"tables": {tables_json}, "structured_data": {json.dumps(structured_data)}}}'
+        return Response(content=body, media_type="application/json")
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Extraction failed: {str(e)}")
 
 @router.post("/propose_schema")
-async def propose_schema(request: ExtractionRequest):
+def propose_schema(request: ExtractionRequest):
     try:
         doc_id = request.document_id
         if doc_id not in document_store:
@@ -0,0 +1,83 @@
+import threading
+import numpy as np
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple, Hashable
+from app.core.metrics import registry
+
+CACHE_LOOKUPS = registry.counter("ultra_doc_answer_cache_lookups_total", "Semantic answer cache lookups", ["result"])
+
+class _DocumentCache:
+    def __init__(self, revision):
+        self.revision = revision
+        # question -> (normalized embedding, context, response); order = LRU
+        self.entries: "OrderedDict[str, Tuple[np.ndarray, Hashable, Dict[str, Any]]]" = OrderedDict()
+
+class SemanticAnswerCache:
+    """
+    Per-document cache of answered questions, matched by cosine similarity of the
+    (normalized) question embeddings that /ask already computes.
+    Similarity alone is not enough for template questions that differ in one
+    field, so a hit also requires an equal `context` key (the caller passes the
+    retrieved chunks and the top schema mapping).
+    Entries are tied to a document revision and dropped when it changes.
+    """
+    def __init__(self, threshold: float = 0.92, max_entries_per_document: int = 128, max_documents: int = 256):
+        self.threshold = threshold
+        self.max_entries_per_document = max_entries_per_document
+        self.max_documents = max_documents
+        self._documents: "OrderedDict[str, _DocumentCache]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _document(self, document_id: str, revision, create: bool) -> Optional[_DocumentCache]:
+        doc = self._documents.get(document_id)
+        if doc is not None and doc.revision != revision:
+            del self._documents[document_id]
+            doc = None
+        if doc is None and create:
+            doc = self._documents[document_id] = _DocumentCache(revision)
+            if len(self._documents) > self.max_documents:
+                self._documents.popitem(last=False)
+        if doc is not None:
+            self._documents.move_to_end(document_id)
+        return doc
+
+    def lookup(self, document_id: str, revision, embedding: np.ndarray, context: Hashable = None) -> Optional[Dict[str, Any]]:
+        """
+        Returns a copy of the best cached response with the same context and a
+        similarity above the threshold (with a "cache" block describing the match), or None.
+        """
+        embedding = np.asarray(embedding, dtype=np.float32).ravel()
+        with self._lock:
+            doc = self._document(document_id, revision, create=False)
+            questions = [q for q, entry in doc.entries.items() if entry[1] == context] if doc is not None else []
+            if not questions:
+                CACHE_LOOKUPS.inc(result="miss")
+                return None
+
+            matrix = np.stack([doc.entries[q][0] for q in questions])
+            scores = matrix @ embedding
+            best = int(np.argmax(scores))
+            if scores[best] < self.threshold:
+                CACHE_LOOKUPS.inc(result="miss")
+                return None
+
+            question = questions[best]
+            doc.entries.move_to_end(question)
+            response = dict(doc.entries[question][2])
+
+        CACHE_LOOKUPS.inc(result="hit")
+        response["cache"] = {"hit": True, "matched_question": question, "similarity": float(scores[best])}
+        return response
+
+    def store(self, document_id: str, revision, question: str, embedding: np.ndarray, response: Dict[str, Any], context: Hashable = None):
+        embedding = np.asarray(embedding, dtype=np.float32).ravel()
+        with self._lock:
+            doc = self._document(document_id, revision, create=True)
+            doc.entries[question] = (embedding, context, response)
+            doc.entries.move_to_end(question)
+            if len(doc.entries) > self.max_entries_per_document:
+                doc.entries.popitem(last=False)
+
+    def invalidate(self, document_id: str):
+        with self._lock:
+            self._documents.pop(document_id, None)
@@ -0,0 +1,176 @@
+import numpy as np
+from typing import List, Dict, Any, Iterable
+
+# Keys stored in dedicated columns; anything else goes to a sparse side table
+_COLUMN_KEYS = ("text", "document_id", "section_type", "page_number", "chunk_hash")
+# Stored in the page column for chunks without a page number (read back as None)
+_NO_PAGE = -1
+
+class _Column:
+    """
+    Append-only numpy column with amortized growth.
+    """
+    def __init__(self, dtype, capacity: int = 1024):
+        self.data = np.empty(capacity, dtype=dtype)
+        self.size = 0
+
+    def extend(self, values):
+        values = np.asarray(values, dtype=self.data.dtype)
+        needed = self.size + len(values)
+        if needed > len(self.data):
+            grown = np.empty(max(needed, len(self.data) * 2), dtype=self.data.dtype)
+            grown[:self.size] = self.data[:self.size]
+            self.data = grown
+        self.data[self.size:needed] = values
+        self.size = needed
+
+    def view(self) -> np.ndarray:
+        return self.data[:self.size]
+
+    @classmethod
+    def from_array(cls, values: np.ndarray) -> "_Column":
+        column = cls(values.dtype, max(len(values), 1024))
+        column.extend(values)
+        return column
+
+class ChunkMetadata:
+    """
+    Columnar store for vector chunk metadata.
+    document_id / section_type are dictionary-encoded into integer code arrays,
+    page numbers live in an int32 array and chunk text in one shared utf-8
+    buffer addressed by offset/length, so there is no per-chunk dict or str.
+    Rows are appended in increasing chunk-id order; removals are tombstoned and
+    compacted once they make up half the rows.
+    """
+    def __init__(self):
+        self._ids = _Column(np.int64)
+        self._alive = _Column(np.bool_)
+        self._document_codes = _Column(np.int32)
+        self._section_codes = _Column(np.int16)
+        self._page_numbers = _Column(np.int32)
+        self._text_offsets = _Column(np.int64)
+        self._text_lengths = _Column(np.int32)
+        self._hashes = _Column("S64")
+        self._text = bytearray()
+        self._documents: List[str] = []
+        self._document_lookup: Dict[str, int] = {}
+        self._sections: List[str] = []
+        self._section_lookup: Dict[str, int] = {}
+        self._extra: Dict[int, Dict[str, Any]] = {}
+        self._dead = 0
+
+    def __len__(self) -> int:
+        return self._ids.size - self._dead
+
+    @staticmethod
+    def _encode(value, vocab: List, lookup: Dict) -> int:
+        code = lookup.get(value)
+        if code is None:
+            code = lookup[value] = len(vocab)
+            vocab.append(value)
+        return code
+
+    def append(self, ids: Iterable[int], metadata: List[Dict[str, Any]]):
+        ids = list(ids)
+        if self._ids.size and ids and ids[0] <= self._ids.data[self._ids.size - 1]:
+            raise ValueError("Chunk ids must be appended in increasing order")
+
+        offsets, lengths, hashes = [], [], []
+        for chunk_id, meta in zip(ids, metadata):
+            encoded = meta.get("text", "").encode("utf-8")
+            offsets.append(len(self._text))
+            lengths.append(len(encoded))
+            self._text += encoded
+            digest = meta.get("chunk_hash")
+            hashes.append(digest.encode("ascii") if digest else b"")
+            extra = {k: v for k, v in meta.items() if k not in _COLUMN_KEYS}
+            if extra:
+                self._extra[chunk_id] = extra
+
+        self._ids.extend(ids)
+        self._alive.extend([True] * len(ids))
+        self._document_codes.extend([self._encode(m.get("document_id"), self._documents, self._document_lookup) for m in metadata])
+        self._section_codes.extend([self._encode(m.get("section_type"), self._sections, self._section_lookup) for m in metadata])
+        self._page_numbers.extend([_NO_PAGE if m.get("page_number") is None else m["page_number"] for m in metadata])
+        self._text_offsets.extend(offsets)
+        self._text_lengths.extend(lengths)
+        self._hashes.extend(hashes)
+
+    def _rows(self, ids) -> np.ndarray:
+        """
+        Maps chunk ids to live row positions (unknown or removed ids are dropped).
+        """
+        ids = np.asarray(ids, dtype=np.int64)
+        all_ids = self._ids.view()
+        rows = np.searchsorted(all_ids, ids)
+        rows = rows[rows < len(all_ids)]
+        rows = rows[np.isin(all_ids[rows], ids)]
+        return rows[self._alive.view()[rows]]
+
+    def _row_dict(self, row: int) -> Dict[str, Any]:
+        offset = int(self._text_offsets.data[row])
+        chunk_id = int(self._ids.data[row])
+        page_number = int(self._page_numbers.data[row])
+        meta = {
+            "text": self._text[offset:offset + int(self._text_lengths.data[row])].decode("utf-8"),
+            "section_type": self._sections[self._section_codes.data[row]],
+            "page_number": None if page_number == _NO_PAGE else page_number,
+            "document_id": self._documents[self._document_codes.data[row]],
+        }
+        digest = self._hashes.data[row]
+        if digest:
+            meta["chunk_hash"] = digest.decode("ascii")
+        meta.update(self._extra.get(chunk_id, {}))
+        return meta
+
+    def get(self, ids: Iterable[int]) -> Dict[int, Dict[str, Any]]:
+        """
+        Materializes {chunk_id: metadata dict} for the given ids.
+        """
+        ids = list(ids)
+        if not ids or not self._ids.size:
+            return {}
+        return {int(self._ids.data[row]): self._row_dict(row) for row in self._rows(ids)}
+
+    def document_chunks(self, document_id: str) -> Dict[int, Dict[str, Any]]:
+        code = self._document_lookup.get(document_id)
+        if code is None:
+            return {}
+        rows = np.nonzero((self._document_codes.view() == code) & self._alive.view())[0]
+        return {int(self._ids.data[row]): self._row_dict(row) for row in rows}
+
+    def remove(self, ids: Iterable[int]):
+        ids = list(ids)
+        if not ids or not self._ids.size:
+            return
+        rows = self._rows(ids)
+        self._alive.data[rows] = False
+        self._dead += len(rows)
+        for chunk_id in ids:
+            self._extra.pop(chunk_id, None)
+        if self._dead * 2 > self._ids.size:
+            self._compact()
+
+    def _compact(self):
+        keep = np.nonzero(self._alive.view())[0]
+        text = bytearray()
+        offsets = np.empty(len(keep), dtype=np.int64)
+        for i, row in enumerate(keep):
+            start = int(self._text_offsets.data[row])
+            offsets[i] = len(text)
+            text += self._text[start:start + int(self._text_lengths.data[row])]
+
+        self._text = text
+        self._text_offsets = _Column.from_array(offsets)
+        for name in ("_ids", "_alive", "_document_codes", "_section_codes", "_page_numbers", "_text_lengths", "_hashes"):
+            column = getattr(self, name)
+            setattr(self, name, _Column.from_array(column.view()[keep]))
+        self._dead = 0
+
+    def nbytes(self) -> int:
+        """
+        Approximate memory held by the columns and text buffer.
+        """
+        columns = (self._ids, self._alive, self._document_codes, self._section_codes,
+                   self._page_numbers, self._text_offsets, self._text_lengths, self._hashes)
+        return sum(c.data.nbytes for c in columns) + len(self._text)
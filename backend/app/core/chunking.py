@@ -1,5 +1,34 @@
 import re
-from typing import List, Dict, Any
+import hashlib
+from typing import List, Dict, Any, Tuple
+from app.core.metrics import timed
+
+def chunk_hash(chunk: Dict[str, Any]) -> str:
+    """
+    Stable content hash of a chunk (page, section and text), used to diff revisions.
+    """
+    key = f"{chunk['page_number']}\x1f{chunk['section_type']}\x1f{chunk['text']}"
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+def diff_chunks(existing: Dict[int, Dict[str, Any]], chunks: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[int]]:
+    """
+    Diffs a revision's chunks against the stored {chunk_id: metadata} by chunk_hash.
+    Matching is a multiset match (each unchanged chunk keeps one existing vector,
+    so duplicated chunks are counted). Returns (chunks to add, chunk ids to remove).
+    """
+    available: Dict[str, List[int]] = {}
+    for chunk_id, meta in sorted(existing.items()):
+        available.setdefault(meta.get("chunk_hash"), []).append(chunk_id)
+
+    new_chunks = []
+    for chunk in chunks:
+        matches = available.get(chunk["chunk_hash"])
+        if matches:
+            matches.pop()
+        else:
+            new_chunks.append(chunk)
+    remove_ids = sorted(chunk_id for ids in available.values() for chunk_id in ids)
+    return new_chunks, remove_ids
 
 class ContentChunker:
     def __init__(self):
@@ -19,6 +48,7 @@ class ContentChunker:
                 return section
         return "misc"
 
+    @timed("chunk")
     def chunk(self, parsed_document) -> List[Dict[str, Any]]:
         """
         Chunks the parsed document into semantic, context-aware blocks.
@@ -85,5 +115,8 @@ class ContentChunker:
             if current_heading:
                 current_chunk["text"] = f"[{current_heading}] {current_chunk['text']}"
             chunks.append(current_chunk)
+
+        for chunk in chunks:
+            chunk["chunk_hash"] = chunk_hash(chunk)
             
         return chunks
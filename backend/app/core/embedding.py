@@ -1,10 +1,12 @@
 from sentence_transformers import SentenceTransformer
 import numpy as np
+from app.core.metrics import timed
 
 class EmbeddingModel:
     def __init__(self, model_name="BAAI/bge-small-en-v1.5"):
         self.model = SentenceTransformer(model_name)
 
+    @timed("embed")
     def embed(self, text_chunks: list[str]) -> np.ndarray:
         """
         Generates embeddings for a list of text strings.
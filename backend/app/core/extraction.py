@@ -1,22 +1,74 @@
 import pandas as pd
 from typing import List, Dict, Any, Optional
-import os
-from groq import Groq
 import json
+from app.core.llm_client import get_llm_client
+
+def _value_in_text(value, text: str) -> bool:
+    """
+    Whether an extracted value can be found in `text` (whitespace/case-insensitive).
+    """
+    if isinstance(value, list):
+        return bool(value) and all(_value_in_text(v, text) for v in value)
+    if isinstance(value, bool) or not isinstance(value, (str, int, float)):
+        return False
+    if isinstance(value, str):
+        candidates = {value}
+    else:
+        candidates = {f"{value:g}", f"{value:.2f}", f"{value:,.2f}"}
+        if float(value).is_integer():
+            candidates |= {str(int(value)), f"{int(value):,}"}
+    haystack = " ".join(text.split()).lower()
+    return any(" ".join(c.split()).lower() in haystack for c in candidates if c.strip())
+
+def merge_partial_extraction(
+    previous: Dict[str, Any],
+    updates: Dict[str, Any],
+    changed_text: str,
+    unchanged_text: str
+) -> Dict[str, Any]:
+    """
+    Merges an extraction run over a revision's changed pages into the previous results.
+    `changed_text` is the previous revision's text of those pages. An empty `updates`
+    (extract_structured_data returns {} on failure) changes nothing. A non-empty
+    re-extracted value wins; otherwise the previous value is dropped only if it was
+    found on a changed page and is not on an unchanged one. Values that cannot be
+    located (reformatted by the LLM, booleans) are kept.
+    """
+    if not updates:
+        return dict(previous)
+    merged = {}
+    for field in {**previous, **updates}:
+        value = updates.get(field)
+        old = previous.get(field)
+        if value not in (None, ""):
+            merged[field] = value
+        elif _value_in_text(old, changed_text) and not _value_in_text(old, unchanged_text):
+            merged[field] = None
+        else:
+            merged[field] = old
+    return merged
 
 class DataExtractor:
     def __init__(self, api_key: str = None):
-        key = api_key or os.getenv("GROQ_API_KEY")
-        if not key:
-            self.client = None
+        self.client = get_llm_client(api_key)
+        if self.client is None:
             print("Warning: GROQ_API_KEY not set. Structured extraction will fail.")
-        else:
-            self.client = Groq(api_key=key)
 
     def extract_table_data(self, parsed_document) -> List[Dict[str, Any]]:
         """
         Extracts tables from the parsed document.
         """
+        store = getattr(parsed_document, "tables", None)
+        if store is not None and len(store):
+            return [
+                {
+                    "dataframe": store.to_dataframe(i),
+                    "page_number": store.page_numbers[i],
+                    "table_index": i
+                }
+                for i in range(len(store))
+            ]
+
         tables = []
         for item, level in parsed_document.iterate_items():
             if item.type == "table":
@@ -55,8 +107,9 @@ class DataExtractor:
         """
 
         try:
-            completion = self.client.chat.completions.create(
+            completion = self.client.complete(
                 model="llama-3.3-70b-versatile",
+                operation="extract_structured_data",
                 messages=[
                     {"role": "system", "content": system_prompt},
                     {"role": "user", "content": user_prompt}
@@ -65,7 +118,7 @@ class DataExtractor:
                 response_format={"type": "json_object"}
             )
 
-            result = json.loads(completion.choices[0].message.content)
+            result = json.loads(completion.content)
             logger.info("Structured extraction completed successfully")
             return result
 
@@ -93,8 +146,9 @@ class DataExtractor:
         """
 
         try:
-            completion = self.client.chat.completions.create(
+            completion = self.client.complete(
                 model="llama-3.3-70b-versatile",
+                operation="propose_schema",
                 messages=[
                     {"role": "system", "content": system_prompt},
                     {"role": "user", "content": user_prompt}
@@ -103,7 +157,7 @@ class DataExtractor:
                 response_format={"type": "json_object"}
             )
 
-            result = json.loads(completion.choices[0].message.content)
+            result = json.loads(completion.content)
             if not result or "error" in result:
                 return {"note": "Sparse document, no complex schema proposed", "standard_fields": "string"}
             return result
@@ -136,8 +190,9 @@ class DataExtractor:
         """
 
         try:
-            completion = self.client.chat.completions.create(
+            completion = self.client.complete(
                 model="llama-3.3-70b-versatile",
+                operation="map_query_to_schema",
                 messages=[
                     {"role": "system", "content": "You are a logistics data analyst. You excel at mapping natural language queries to structured data schemas. Return JSON."},
                     {"role": "user", "content": prompt}
@@ -145,7 +200,7 @@ class DataExtractor:
                 temperature=0,
                 response_format={"type": "json_object"}
             )
-            data = json.loads(completion.choices[0].message.content)
+            data = json.loads(completion.content)
             if isinstance(data, dict):
                 return data.get("fields", data.get("mappings", []))
             return data if isinstance(data, list) else []
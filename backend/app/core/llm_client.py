@@ -0,0 +1,298 @@
+import os
+import json
+import time
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import List, Dict, Any, Optional
+
+import httpx
+
+from app.core.metrics import registry, track_stage, record_llm_usage
+from app.core.logging_config import logger
+
+LLM_RETRIES = registry.counter("ultra_doc_llm_retries_total", "LLM attempts retried after a failure", ["model", "reason"])
+LLM_HEDGES = registry.counter("ultra_doc_llm_hedged_requests_total", "Hedged duplicate LLM requests issued", ["model"])
+
+class LLMError(Exception):
+    def __init__(self, message: str, status_code: int = None, retryable: bool = False, retry_after: float = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retryable = retryable
+        self.retry_after = retry_after
+
+class LLMTimeoutError(LLMError):
+    def __init__(self, message: str):
+        super().__init__(message, retryable=True)
+
+class LLMUsage:
+    def __init__(self, prompt_tokens: int = 0, completion_tokens: int = 0):
+        self.prompt_tokens = prompt_tokens
+        self.completion_tokens = completion_tokens
+
+class LLMResponse:
+    def __init__(self, content: str, model: str, usage: LLMUsage = None):
+        self.content = content
+        self.model = model
+        self.usage = usage or LLMUsage()
+
+def _retry_after(headers) -> Optional[float]:
+    try:
+        return float(headers.get("retry-after")) if headers and headers.get("retry-after") else None
+    except (TypeError, ValueError):
+        return None
+
+class GroqBackend:
+    """
+    Groq SDK backend sharing one pooled httpx client. SDK retries are disabled;
+    LLMClient owns retry policy.
+    """
+    def __init__(self, api_key: str, base_url: str = None, max_connections: int = 20):
+        from groq import Groq
+        self.http_client = httpx.Client(limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections))
+        self.client = Groq(api_key=api_key, base_url=base_url, http_client=self.http_client, max_retries=0)
+
+    def complete(self, model: str, messages: List[Dict[str, str]], timeout: float, **params) -> LLMResponse:
+        import groq
+        try:
+            completion = self.client.chat.completions.create(model=model, messages=messages, timeout=timeout, **params)
+        except groq.APITimeoutError as e:
+            raise LLMTimeoutError(str(e))
+        except groq.APIStatusError as e:
+            status = e.status_code
+            raise LLMError(str(e), status, retryable=status == 429 or status >= 500, retry_after=_retry_after(e.response.headers))
+        except groq.APIConnectionError as e:
+            raise LLMError(str(e), retryable=True)
+
+        usage = getattr(completion, "usage", None)
+        return LLMResponse(
+            completion.choices[0].message.content,
+            model,
+            LLMUsage(getattr(usage, "prompt_tokens", 0) or 0, getattr(usage, "completion_tokens", 0) or 0)
+        )
+
+class OpenAICompatibleBackend:
+    """
+    Plain HTTP backend for any OpenAI-compatible /chat/completions server
+    (vLLM, llama.cpp, Ollama, the benchmark fake server, ...).
+    """
+    def __init__(self, base_url: str, api_key: str = None, max_connections: int = 20):
+        headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
+        self.url = base_url.rstrip("/") + "/chat/completions"
+        self.http_client = httpx.Client(
+            headers=headers,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        )
+
+    def complete(self, model: str, messages: List[Dict[str, str]], timeout: float, **params) -> LLMResponse:
+        try:
+            resp = self.http_client.post(self.url, json={"model": model, "messages": messages, **params}, timeout=timeout)
+        except httpx.TimeoutException as e:
+            raise LLMTimeoutError(str(e) or "LLM request timed out")
+        except httpx.TransportError as e:
+            raise LLMError(str(e), retryable=True)
+
+        if resp.status_code >= 400:
+            status = resp.status_code
+            raise LLMError(
+                f"LLM backend returned {status}: {resp.text[:200]}",
+                status,
+                retryable=status == 429 or status >= 500,
+                retry_after=_retry_after(resp.headers)
+            )
+
+        data = resp.json()
+        usage = data.get("usage") or {}
+        return LLMResponse(
+            data["choices"][0]["message"]["content"],
+            model,
+            LLMUsage(usage.get("prompt_tokens", 0) or 0, usage.get("completion_tokens", 0) or 0)
+        )
+
+class LLMClient:
+    """
+    Shared LLM client used by DataExtractor and RAGEngine.
+    - Connection pooling via the backend's httpx client
+    - Global and per-model concurrency semaphores
+    - Deadline-aware per-attempt timeouts
+    - Exponential backoff with full jitter on 429/5xx/timeouts (honours Retry-After)
+    - Optional hedged duplicate request after `hedge_after` seconds
+    """
+    def __init__(
+        self,
+        backend,
+        max_concurrency: int = 8,
+        max_concurrency_per_model: int = 4,
+        timeout: float = 30.0,
+        max_retries: int = 3,
+        backoff_base: float = 0.5,
+        backoff_max: float = 8.0,
+        hedge_after: float = None,
+        model_aliases: Dict[str, str] = None,
+    ):
+        self.backend = backend
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.hedge_after = hedge_after
+        self.model_aliases = model_aliases or {}
+        self.max_concurrency_per_model = max_concurrency_per_model
+        self._global_slots = threading.BoundedSemaphore(max_concurrency)
+        self._model_slots: Dict[str, threading.BoundedSemaphore] = {}
+        self._model_slots_lock = threading.Lock()
+        self._hedge_pool = ThreadPoolExecutor(max_workers=max_concurrency * 2, thread_name_prefix="llm-hedge") if hedge_after else None
+
+    @classmethod
+    def from_env(cls, api_key: str = None) -> Optional["LLMClient"]:
+        """
+        Builds a client from LLM_* environment variables.
+        Returns None when the Groq backend is selected but no API key is configured.
+        """
+        backend_name = os.getenv("LLM_BACKEND", "groq").lower()
+        max_connections = int(os.getenv("LLM_MAX_CONNECTIONS", "20"))
+        if backend_name == "openai":
+            backend = OpenAICompatibleBackend(
+                os.getenv("LLM_BASE_URL", "http://127.0.0.1:8080/v1"),
+                api_key or os.getenv("LLM_API_KEY"),
+                max_connections
+            )
+        elif backend_name == "groq":
+            key = api_key or os.getenv("GROQ_API_KEY")
+            if not key:
+                return None
+            backend = GroqBackend(key, os.getenv("GROQ_BASE_URL") or None, max_connections)
+        else:
+            raise ValueError(f"Unknown LLM_BACKEND: {backend_name}")
+
+        hedge_after = os.getenv("LLM_HEDGE_AFTER_SECONDS")
+        return cls(
+            backend,
+            max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", "8")),
+            max_concurrency_per_model=int(os.getenv("LLM_MAX_CONCURRENCY_PER_MODEL", "4")),
+            timeout=float(os.getenv("LLM_TIMEOUT_SECONDS", "30")),
+            max_retries=int(os.getenv("LLM_MAX_RETRIES", "3")),
+            hedge_after=float(hedge_after) if hedge_after else None,
+            model_aliases=json.loads(os.getenv("LLM_MODEL_ALIASES", "{}")),
+        )
+
+    def _model_semaphore(self, model: str) -> threading.BoundedSemaphore:
+        with self._model_slots_lock:
+            if model not in self._model_slots:
+                self._model_slots[model] = threading.BoundedSemaphore(self.max_concurrency_per_model)
+            return self._model_slots[model]
+
+    @staticmethod
+    def _remaining(deadline: float) -> float:
+        return deadline - time.monotonic()
+
+    def _attempt(self, model: str, messages, deadline: float, params: Dict[str, Any]) -> LLMResponse:
+        """
+        One request under the global and per-model concurrency limits.
+        The per-model slot is taken first, so calls queued behind a busy model
+        do not hold global slots that other models could use.
+        Waiting for a slot counts against the deadline.
+        """
+        model_slots = self._model_semaphore(model)
+        if not model_slots.acquire(timeout=max(self._remaining(deadline), 0)):
+            raise LLMTimeoutError(f"Timed out waiting for an LLM slot for {model}")
+        try:
+            if not self._global_slots.acquire(timeout=max(self._remaining(deadline), 0)):
+                raise LLMTimeoutError("Timed out waiting for a global LLM slot")
+            try:
+                remaining = self._remaining(deadline)
+                if remaining <= 0:
+                    raise LLMTimeoutError("LLM deadline exceeded")
+                return self.backend.complete(model, messages, timeout=min(self.timeout, remaining), **params)
+            finally:
+                self._global_slots.release()
+        finally:
+            model_slots.release()
+
+    def _hedged_attempt(self, model: str, messages, deadline: float, params: Dict[str, Any]) -> LLMResponse:
+        """
+        Sends a duplicate request if the first has not finished after hedge_after
+        seconds and returns whichever succeeds first.
+        """
+        first = self._hedge_pool.submit(self._attempt, model, messages, deadline, params)
+        done, _ = wait([first], timeout=min(self.hedge_after, max(self._remaining(deadline), 0)))
+        if done:
+            return first.result()
+
+        LLM_HEDGES.inc(model=model)
+        pending = {first, self._hedge_pool.submit(self._attempt, model, messages, deadline, params)}
+        error = None
+        while pending:
+            done, pending = wait(pending, timeout=max(self._remaining(deadline), 0), return_when=FIRST_COMPLETED)
+            if not done:
+                raise LLMTimeoutError("LLM deadline exceeded")
+            for future in done:
+                try:
+                    return future.result()
+                except LLMError as e:
+                    error = e
+        raise error
+
+    def _backoff(self, attempt: int, error: LLMError) -> float:
+        if error.retry_after is not None:
+            return error.retry_after
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def complete(
+        self,
+        model: str,
+        messages: List[Dict[str, str]],
+        operation: str = "completion",
+        deadline: float = None,
+        timeout: float = None,
+        **params
+    ) -> LLMResponse:
+        """
+        Runs a chat completion with retries, bounded by `deadline` (a time.monotonic()
+        timestamp) or `timeout` seconds from now (defaults to 4x the per-attempt timeout).
+        """
+        model = self.model_aliases.get(model, model)
+        if deadline is None:
+            deadline = time.monotonic() + (timeout if timeout is not None else self.timeout * 4)
+
+        with track_stage(f"llm.{operation}"):
+            attempt = 0
+            while True:
+                try:
+                    if self._hedge_pool is not None:
+                        response = self._hedged_attempt(model, messages, deadline, params)
+                    else:
+                        response = self._attempt(model, messages, deadline, params)
+                    break
+                except LLMError as e:
+                    if not e.retryable or attempt >= self.max_retries:
+                        raise
+                    delay = self._backoff(attempt, e)
+                    if delay >= self._remaining(deadline):
+                        raise
+                    reason = str(e.status_code) if e.status_code else type(e).__name__
+                    LLM_RETRIES.inc(model=model, reason=reason)
+                    logger.warning(f"LLM call {operation} failed ({reason}), retrying in {delay:.2f}s")
+                    time.sleep(delay)
+                    attempt += 1
+
+        record_llm_usage(model, operation, response)
+        return response
+
+_shared_client: Optional[LLMClient] = None
+_shared_client_loaded = False
+_shared_client_lock = threading.Lock()
+
+def get_llm_client(api_key: str = None) -> Optional[LLMClient]:
+    """
+    Returns the process-wide LLM client (built once from the environment).
+    An explicit api_key builds a dedicated client instead.
+    """
+    global _shared_client, _shared_client_loaded
+    if api_key:
+        return LLMClient.from_env(api_key)
+    with _shared_client_lock:
+        if not _shared_client_loaded:
+            _shared_client = LLMClient.from_env()
+            _shared_client_loaded = True
+        return _shared_client
@@ -1,69 +1,162 @@
+import io
 import os
+import json
+import time
 import pdfplumber
 import docx
 from bs4 import BeautifulSoup
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Union, BinaryIO
 from pathlib import Path
+from types import MappingProxyType
+from app.core.table_store import TableStore
+from app.core.metrics import timed
+
+# Prefer the C-backed lxml tree builder when it is installed
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = "lxml"
+except ImportError:
+    HTML_PARSER = "html.parser"
+
+DocumentSource = Union[str, os.PathLike, bytes, BinaryIO]
+
+# Shared read-only metadata for the (common) items that carry none
+_NO_METADATA = MappingProxyType({})
 
 class ParsedItem:
+    # __slots__: documents hold one item per line, so skip the per-instance __dict__
+    __slots__ = ("type", "text", "page_no", "_metadata")
+
     def __init__(self, type: str, text: str, page_no: int = 1, metadata: Dict[str, Any] = None):
         self.type = type # "text", "heading", "table"
         self.text = text
         self.page_no = page_no
-        self.metadata = metadata or {}
+        self._metadata = metadata or None
+
+    @property
+    def metadata(self):
+        return self._metadata if self._metadata is not None else _NO_METADATA
 
 class ParsedDocument:
-    def __init__(self, items: List[ParsedItem]):
+    def __init__(self, items: List[ParsedItem], page_timings: List[Dict[str, Any]] = None, tables: TableStore = None):
         self.items = items
+        self.tables = tables if tables is not None else TableStore()
+        # Per-page parse timings (PDF only): [{"page_number", "seconds", "table_scan"}]
+        self.page_timings = page_timings or []
 
     def iterate_items(self):
         for item in self.items:
             # Yield (item, 0)
             yield item, 0
 
+# "adaptive": only run pdfplumber table extraction on pages with ruling lines/rects/curves
+# "always": run table extraction on every page (previous behaviour)
+TABLE_MODES = ("adaptive", "always")
+
+def _table_settings_from_env() -> Dict[str, Any]:
+    raw = os.getenv("PARSER_TABLE_SETTINGS", "{}")
+    try:
+        settings = json.loads(raw)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"PARSER_TABLE_SETTINGS is not valid JSON: {e}") from e
+    if not isinstance(settings, dict):
+        raise ValueError(f"PARSER_TABLE_SETTINGS must be a JSON object of pdfplumber table settings, got: {raw}")
+    return settings
+
+def _min_table_edges_from_env() -> int:
+    raw = os.getenv("PARSER_MIN_TABLE_EDGES", "2")
+    try:
+        return int(raw)
+    except ValueError:
+        raise ValueError(f"PARSER_MIN_TABLE_EDGES must be an integer, got: {raw}") from None
+
 class DocumentParser:
-    def __init__(self):
-        pass
+    def __init__(self, table_mode: str = None, table_settings: Dict[str, Any] = None, min_table_edges: int = None):
+        self.table_mode = (table_mode or os.getenv("PARSER_TABLE_MODE", "adaptive")).lower()
+        if self.table_mode not in TABLE_MODES:
+            raise ValueError(f"Unknown PARSER_TABLE_MODE: {self.table_mode} (expected one of {', '.join(TABLE_MODES)})")
+        self.table_settings = table_settings if table_settings is not None else _table_settings_from_env()
+        self.min_table_edges = min_table_edges if min_table_edges is not None else _min_table_edges_from_env()
 
-    def parse(self, file_path: str) -> ParsedDocument:
+    @timed("parse")
+    def parse(self, source: DocumentSource, filename: str = None) -> ParsedDocument:
+        """
+        Parses a document from a path, raw bytes or a binary file-like object.
+        For bytes and streams, `filename` is required to pick the format.
+        """
         from app.core.logging_config import logger
+        file_path = filename or (os.fspath(source) if isinstance(source, (str, os.PathLike)) else "")
         logger.info(f"Initiating lightweight parse for: {file_path}")
         
         ext = os.path.splitext(file_path)[1].lower()
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            source = io.BytesIO(source)
         items = []
+        tables = TableStore()
+        page_timings = []
 
         try:
             if ext == ".pdf":
-                items = self._parse_pdf(file_path)
+                items = self._parse_pdf(source, tables, page_timings)
             elif ext == ".docx":
-                items = self._parse_docx(file_path)
+                items = self._parse_docx(source, tables)
             elif ext == ".html" or ext == ".htm":
-                items = self._parse_html(file_path)
+                items = self._parse_html(source, tables)
             else:
                 logger.warning(f"Unsupported format: {ext}")
                 items = [ParsedItem("text", "Unsupported file format.", 1)]
 
             logger.info(f"Successfully parsed {file_path} into {len(items)} items")
-            return ParsedDocument(items)
+            if page_timings:
+                slowest = max(page_timings, key=lambda t: t["seconds"])
+                scanned = sum(1 for t in page_timings if t["table_scan"])
+                logger.info(
+                    f"Parsed {len(page_timings)} pages, table scan on {scanned}; "
+                    f"slowest page {slowest['page_number']} ({slowest['seconds']:.3f}s)"
+                )
+            return ParsedDocument(items, page_timings, tables)
         except Exception as e:
             logger.error(f"Parse failed for {file_path}: {e}", exc_info=True)
             raise RuntimeError(f"Error parsing document: {e}")
 
-    def _parse_pdf(self, file_path: str) -> List[ParsedItem]:
+    def _page_may_have_tables(self, page) -> bool:
+        """
+        Cheap pre-check before full table detection.
+        With the default "lines" strategies pdfplumber builds tables from page.edges
+        (ruling lines plus rect and curve edges), so a page without any of these
+        objects cannot yield a table. Counting objects avoids computing the edges.
+        """
+        if self.table_mode == "always":
+            return True
+
+        strategies = (
+            self.table_settings.get("vertical_strategy", "lines"),
+            self.table_settings.get("horizontal_strategy", "lines"),
+        )
+        if any(s not in ("lines", "lines_strict") for s in strategies):
+            # Text/explicit strategies don't depend on drawn edges
+            return True
+
+        return len(page.lines) + len(page.rects) + len(page.curves) >= self.min_table_edges
+
+    def _parse_pdf(self, source: DocumentSource, tables: TableStore, page_timings: List[Dict[str, Any]] = None) -> List[ParsedItem]:
         items = []
-        with pdfplumber.open(file_path) as pdf:
+        with pdfplumber.open(source) as pdf:
             for i, page in enumerate(pdf.pages):
                 page_no = i + 1
+                page_start = time.perf_counter()
                 
-                # Extract Tables
-                tables = page.extract_tables()
-                for table in tables:
+                # Extract Tables (only where tables are likely)
+                table_scan = self._page_may_have_tables(page)
+                page_tables = page.extract_tables(self.table_settings or None) if table_scan else []
+                for table in page_tables:
                     if table:
                         # Clean table data
                         clean_table = [[str(cell or "").strip() for cell in row] for row in table]
                         import pandas as pd
                         df = pd.DataFrame(clean_table[1:], columns=clean_table[0]) if len(clean_table) > 1 else pd.DataFrame(clean_table)
-                        items.append(ParsedItem("table", df.to_markdown(index=False), page_no, {"df": df}))
+                        table_index = tables.add(df, page_no)
+                        items.append(ParsedItem("table", df.to_markdown(index=False), page_no, {"table_index": table_index}))
 
                 # Extract Text (excluding table areas if possible, but keep it simple for MVP)
                 text = page.extract_text()
@@ -77,11 +170,18 @@ class DocumentParser:
                             items.append(ParsedItem("heading", line, page_no))
                         else:
                             items.append(ParsedItem("text", line, page_no))
+
+                if page_timings is not None:
+                    page_timings.append({
+                        "page_number": page_no,
+                        "seconds": time.perf_counter() - page_start,
+                        "table_scan": table_scan
+                    })
         return items
 
-    def _parse_docx(self, file_path: str) -> List[ParsedItem]:
+    def _parse_docx(self, source: DocumentSource, tables: TableStore) -> List[ParsedItem]:
         items = []
-        doc = docx.Document(file_path)
+        doc = docx.Document(source)
         for para in doc.paragraphs:
             text = para.text.strip()
             if not text: continue
@@ -100,29 +200,34 @@ class DocumentParser:
             if data:
                 import pandas as pd
                 df = pd.DataFrame(data[1:], columns=data[0]) if len(data) > 1 else pd.DataFrame(data)
-                items.append(ParsedItem("table", df.to_markdown(index=False), 1, {"df": df}))
+                table_index = tables.add(df, 1)
+                items.append(ParsedItem("table", df.to_markdown(index=False), 1, {"table_index": table_index}))
         
         return items
 
-    def _parse_html(self, file_path: str) -> List[ParsedItem]:
+    def _parse_html(self, source: DocumentSource, tables: TableStore) -> List[ParsedItem]:
         items = []
-        with open(file_path, 'r', encoding='utf-8') as f:
-            soup = BeautifulSoup(f, 'html.parser')
+        if isinstance(source, (str, os.PathLike)):
+            with open(source, 'r', encoding='utf-8') as f:
+                soup = BeautifulSoup(f, HTML_PARSER)
+        else:
+            soup = BeautifulSoup(source, HTML_PARSER)
             
-            # Simplified: get headings and paragraphs
-            for element in soup.find_all(['h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'p', 'table']):
-                if element.name.startswith('h'):
-                    items.append(ParsedItem("heading", element.get_text().strip(), 1))
-                elif element.name == 'p':
-                    text = element.get_text().strip()
-                    if text:
-                        items.append(ParsedItem("text", text, 1))
-                elif element.name == 'table':
-                    import pandas as pd
-                    try:
-                        dfs = pd.read_html(str(element))
-                        if dfs:
-                            items.append(ParsedItem("table", dfs[0].to_markdown(index=False), 1, {"df": dfs[0]}))
-                    except:
-                        continue
+        # Simplified: get headings and paragraphs
+        for element in soup.find_all(['h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'p', 'table']):
+            if element.name.startswith('h'):
+                items.append(ParsedItem("heading", element.get_text().strip(), 1))
+            elif element.name == 'p':
+                text = element.get_text().strip()
+                if text:
+                    items.append(ParsedItem("text", text, 1))
+            elif element.name == 'table':
+                import pandas as pd
+                try:
+                    dfs = pd.read_html(io.StringIO(str(element)))
+                    if dfs:
+                        table_index = tables.add(dfs[0], 1)
+                        items.append(ParsedItem("table", dfs[0].to_markdown(index=False), 1, {"table_index": table_index}))
+                except:
+                    continue
         return items
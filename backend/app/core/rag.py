@@ -1,14 +1,10 @@
-import os
-from groq import Groq
+from app.core.llm_client import get_llm_client
 
 class RAGEngine:
     def __init__(self, api_key: str = None):
-        key = api_key or os.getenv("GROQ_API_KEY")
-        if not key:
-            self.client = None
+        self.client = get_llm_client(api_key)
+        if self.client is None:
             print("Warning: GROQ_API_KEY not set. RAG will fail.")
-        else:
-            self.client = Groq(api_key=key)
 
     def answer_question(self, question: str, context: list[dict], structured_context: str = "") -> dict:
         """
@@ -49,8 +45,9 @@ class RAGEngine:
             """
         
         try:
-            completion = self.client.chat.completions.create(
+            completion = self.client.complete(
                 model="llama-3.1-8b-instant",
+                operation="answer_question",
                 messages=[
                     {"role": "system", "content": system_prompt},
                     {"role": "user", "content": user_prompt}
@@ -59,7 +56,7 @@ class RAGEngine:
             )
             logger.info("RAG completion successful")
             return {
-                "answer": completion.choices[0].message.content,
+                "answer": completion.content,
                 "sources": context
             }
         except Exception as e:
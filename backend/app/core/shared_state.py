@@ -0,0 +1,119 @@
+import json
+import pickle
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+
+def open_state_db(path: str) -> sqlite3.Connection:
+    """
+    Opens the shared state database in WAL mode so multiple uvicorn workers
+    can read concurrently while one writes.
+    """
+    conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA busy_timeout=30000")
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value INTEGER NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS documents (
+            document_id TEXT PRIMARY KEY,
+            version INTEGER NOT NULL,
+            parsed_doc BLOB,
+            extraction_results TEXT,
+            proposed_schema TEXT
+        );
+        CREATE TABLE IF NOT EXISTS chunks (
+            position INTEGER PRIMARY KEY,
+            document_id TEXT NOT NULL,
+            metadata TEXT NOT NULL,
+            shard INTEGER
+        );
+        CREATE INDEX IF NOT EXISTS chunks_document_id ON chunks(document_id);
+        CREATE TABLE IF NOT EXISTS index_shards (
+            shard_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            path TEXT NOT NULL,
+            vectors INTEGER NOT NULL,
+            dead INTEGER NOT NULL DEFAULT 0
+        );
+        CREATE INDEX IF NOT EXISTS chunks_shard ON chunks(shard);
+    """)
+    return conn
+
+class SQLiteDocumentStore:
+    """
+    Dict-like document store shared across worker processes.
+    Values are {"parsed_doc", "extraction_results", "proposed_schema"} records;
+    assign a full record to persist changes (nested mutation is not written back).
+    """
+    def __init__(self, conn: sqlite3.Connection, cache_size: int = 32):
+        self.conn = conn
+        self.cache_size = cache_size
+        self._lock = threading.Lock()
+        # document_id -> (version, record); avoids re-unpickling hot documents
+        self._cache: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def __setitem__(self, document_id: str, record: Dict[str, Any]):
+        with self._lock:
+            self.conn.execute(
+                """
+                INSERT INTO documents (document_id, version, parsed_doc, extraction_results, proposed_schema)
+                VALUES (?, 1, ?, ?, ?)
+                ON CONFLICT(document_id) DO UPDATE SET
+                    version = version + 1,
+                    parsed_doc = excluded.parsed_doc,
+                    extraction_results = excluded.extraction_results,
+                    proposed_schema = excluded.proposed_schema
+                """,
+                (
+                    document_id,
+                    pickle.dumps(record.get("parsed_doc"), protocol=pickle.HIGHEST_PROTOCOL),
+                    json.dumps(record.get("extraction_results")),
+                    json.dumps(record.get("proposed_schema")),
+                )
+            )
+            self._cache.pop(document_id, None)
+
+    def get(self, document_id: str, default=None) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self.conn.execute("SELECT version FROM documents WHERE document_id = ?", (document_id,)).fetchone()
+            if row is None:
+                self._cache.pop(document_id, None)
+                return default
+
+            cached = self._cache.get(document_id)
+            if cached and cached[0] == row[0]:
+                self._cache.move_to_end(document_id)
+                return cached[1]
+
+            version, parsed_doc, extraction_results, proposed_schema = self.conn.execute(
+                "SELECT version, parsed_doc, extraction_results, proposed_schema FROM documents WHERE document_id = ?",
+                (document_id,)
+            ).fetchone()
+            record = {
+                "parsed_doc": pickle.loads(parsed_doc) if parsed_doc is not None else None,
+                "extraction_results": json.loads(extraction_results) if extraction_results else None,
+                "proposed_schema": json.loads(proposed_schema) if proposed_schema else None,
+                "revision": version,
+            }
+            self._cache[document_id] = (version, record)
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+            return record
+
+    def __getitem__(self, document_id: str) -> Dict[str, Any]:
+        record = self.get(document_id)
+        if record is None:
+            raise KeyError(document_id)
+        return record
+
+    def __contains__(self, document_id: str) -> bool:
+        with self._lock:
+            return self.conn.execute("SELECT 1 FROM documents WHERE document_id = ?", (document_id,)).fetchone() is not None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
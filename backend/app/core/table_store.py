@@ -0,0 +1,126 @@
+import json
+import math
+import numpy as np
+from typing import List, Dict, Any, Optional, Union
+
+class _TextColumn:
+    """
+    Text column stored as one utf-8 buffer plus an offsets array
+    (cell i is buffer[offsets[i]:offsets[i + 1]]), so there is no per-cell str.
+    """
+    __slots__ = ("buffer", "offsets")
+
+    def __init__(self, values: List[str]):
+        encoded = [v.encode("utf-8") for v in values]
+        self.buffer = b"".join(encoded)
+        self.offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(e) for e in encoded], out=self.offsets[1:])
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.buffer) + self.offsets.nbytes
+
+    def tolist(self) -> List[str]:
+        buffer, offsets = self.buffer, self.offsets.tolist()
+        return [buffer[offsets[i]:offsets[i + 1]].decode("utf-8") for i in range(len(offsets) - 1)]
+
+    def to_numpy(self) -> np.ndarray:
+        return np.array(self.tolist(), dtype=object)
+
+Column = Union[np.ndarray, _TextColumn]
+
+class TableStore:
+    """
+    Per-document columnar table storage, built once at parse time.
+    Each table is kept as a list of column names plus one array per column
+    (text columns as a utf-8 buffer with offsets) instead of a pandas DataFrame.
+    Row dicts are built on demand; only the full JSON serialization is cached.
+    """
+    def __init__(self):
+        self.page_numbers: List[int] = []
+        self.columns: List[List[str]] = []
+        self.data: List[List[Column]] = []
+        self._page_index: Dict[int, List[int]] = {}
+        self._json_cache: Optional[str] = None
+
+    def __len__(self) -> int:
+        return len(self.page_numbers)
+
+    def __getstate__(self):
+        # The JSON cache is derived data; don't persist it with the document
+        state = self.__dict__.copy()
+        state["_json_cache"] = None
+        return state
+
+    @staticmethod
+    def _compact_column(values: np.ndarray) -> Column:
+        if values.dtype == object and all(isinstance(v, str) for v in values):
+            return _TextColumn(values.tolist())
+        return values
+
+    @staticmethod
+    def _clean_value(value):
+        if isinstance(value, float) and math.isnan(value):
+            return None
+        return value
+
+    def add(self, df, page_no: int) -> int:
+        """
+        Adds a DataFrame to the store and returns its table index.
+        """
+        index = len(self.page_numbers)
+        self.page_numbers.append(page_no)
+        self.columns.append([c if isinstance(c, str) else str(c) for c in df.columns])
+        self.data.append([self._compact_column(df.iloc[:, i].to_numpy()) for i in range(df.shape[1])])
+        self._page_index.setdefault(page_no, []).append(index)
+        self._json_cache = None
+        return index
+
+    def records(self, index: int) -> List[Dict[str, Any]]:
+        """
+        Returns a table as a list of row dicts (same shape as DataFrame.to_dict(orient="records"),
+        with NaN as None). Built fresh on every call.
+        """
+        columns = self.columns[index]
+        if not columns:
+            return []
+        rows = zip(*[col.tolist() for col in self.data[index]])
+        return [
+            {name: self._clean_value(v) for name, v in zip(columns, row)}
+            for row in rows
+        ]
+
+    def get_table(self, index: int) -> Dict[str, Any]:
+        return {
+            "page": self.page_numbers[index],
+            "data": self.records(index)
+        }
+
+    def get_tables(self, page: int = None) -> List[Dict[str, Any]]:
+        """
+        Returns serializable tables, optionally limited to one page.
+        """
+        indices = self._page_index.get(page, []) if page is not None else range(len(self))
+        return [self.get_table(i) for i in indices]
+
+    def to_json(self) -> str:
+        """
+        JSON-serialized form of all tables, built on first use and cached until the store changes.
+        """
+        if self._json_cache is None:
+            self._json_cache = json.dumps(self.get_tables())
+        return self._json_cache
+
+    def to_dataframe(self, index: int):
+        import pandas as pd
+        columns = [col.to_numpy() if isinstance(col, _TextColumn) else col for col in self.data[index]]
+        return pd.DataFrame({i: col for i, col in enumerate(columns)}).set_axis(self.columns[index], axis=1)
+
+    def nbytes(self) -> int:
+        """
+        Approximate memory held by the column data (excluding the JSON cache).
+        """
+        return sum(col.nbytes for table in self.data for col in table)
@@ -1,25 +1,88 @@
+import os
+import json
 import faiss
 import numpy as np
 import pickle
+import sqlite3
+import threading
 from typing import List, Dict, Any
+from app.core.metrics import timed
+from app.core.chunk_metadata import ChunkMetadata
+from app.core.shared_state import open_state_db
+
+# Memory-map flat index codes where the FAISS build supports it, read-only either way
+MMAP_READ_FLAGS = getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP) | faiss.IO_FLAG_READ_ONLY
+
+def _new_index(dimension: int):
+    # Inner Product for cosine similarity (normalized vectors); the ID map gives
+    # chunks stable ids so individual vectors can be replaced
+    return faiss.IndexIDMap(faiss.IndexFlatIP(dimension))
 
 class VectorStore:
     def __init__(self, dimension=384):
         # BGE-small default dimension is 384
         self.dimension = dimension
-        self.index = faiss.IndexFlatIP(dimension) # Inner Product for cosine similarity (normalized vectors)
-        self.metadata: List[Dict[str, Any]] = []
+        self.index = _new_index(dimension)
+        # Columnar per-chunk metadata (document, section, page, text), keyed by chunk id
+        self.metadata = ChunkMetadata()
+        self._next_id = 0
+        # Handlers run in a threadpool; FAISS adds/removes are not safe alongside searches
+        self._lock = threading.RLock()
 
-    def add_documents(self, embeddings: np.ndarray, metadata: List[Dict[str, Any]]):
+    @property
+    def ntotal(self) -> int:
         """
-        Adds embeddings and their corresponding metadata to the index.
+        Number of live vectors in the index.
         """
+        return self.index.ntotal
+
+    def _check_dimension(self, embeddings: np.ndarray):
         if embeddings.shape[1] != self.dimension:
             raise ValueError(f"Embedding dimension {embeddings.shape[1]} does not match index dimension {self.dimension}")
-        
-        self.index.add(embeddings)
-        self.metadata.extend(metadata)
 
+    @timed("vector_store.add_documents")
+    def add_documents(self, embeddings: np.ndarray, metadata: List[Dict[str, Any]]) -> List[int]:
+        """
+        Adds embeddings and their corresponding metadata to the index.
+        Returns the chunk ids assigned to them.
+        """
+        self._check_dimension(embeddings)
+
+        with self._lock:
+            ids = list(range(self._next_id, self._next_id + len(metadata)))
+            self.index.add_with_ids(embeddings, np.array(ids, dtype=np.int64))
+            self.metadata.append(ids, metadata)
+            self._next_id += len(ids)
+            return ids
+
+    @timed("vector_store.replace_chunks")
+    def replace_chunks(self, remove_ids: List[int], embeddings: np.ndarray = None, metadata: List[Dict[str, Any]] = None) -> List[int]:
+        """
+        Removes the given chunk ids and adds new embeddings in one step.
+        Returns the ids assigned to the added chunks.
+        """
+        with self._lock:
+            if remove_ids:
+                self.index.remove_ids(np.array(remove_ids, dtype=np.int64))
+                self.metadata.remove(remove_ids)
+            if not metadata:
+                return []
+            return self.add_documents(embeddings, metadata)
+
+    def document_chunks(self, document_id: str) -> Dict[int, Dict[str, Any]]:
+        """
+        Returns {chunk_id: metadata} for all chunks of a document.
+        """
+        with self._lock:
+            return self.metadata.document_chunks(document_id)
+
+    def _lookup_metadata(self, positions: List[int]) -> Dict[int, Dict[str, Any]]:
+        return self.metadata.get(positions)
+
+    def _search_index(self, query: np.ndarray, search_k: int):
+        return self.index.search(query, search_k)
+
+    @timed("vector_store.search")
     def search(self, query_embedding: np.ndarray, k=5, section_filter: str = None):
         """
         Searches the index for the nearest neighbors.
@@ -33,13 +96,16 @@ class VectorStore:
         if section_filter:
             search_k = k * 5 # Fetch more to allow for filtering
             
-        distances, indices = self.index.search(query_embedding.reshape(1, -1), search_k)
+        with self._lock:
+            distances, indices = self._search_index(query_embedding.reshape(1, -1), search_k)
+            metadata = self._lookup_metadata([int(idx) for idx in indices[0] if idx != -1])
         
         results = []
         for i, idx in enumerate(indices[0]):
             if idx == -1: continue
             
-            meta = self.metadata[idx]
+            meta = metadata.get(int(idx))
+            if meta is None: continue
             dist = distances[0][i]
             
             if section_filter and meta.get("section_type") != section_filter:
@@ -54,3 +120,266 @@ class VectorStore:
                 break
                 
         return results
+
+
+# Two shards are merged when the larger holds at most this many times the live
+# vectors of the smaller, which keeps the shard count logarithmic in corpus size
+SHARD_MERGE_RATIO = 2
+
+def _shard_contents(index):
+    """
+    Returns (ids, vectors) held by an IndexIDMap shard.
+    """
+    ids = faiss.vector_to_array(index.id_map)
+    vectors = faiss.downcast_index(index.index).reconstruct_n(0, index.ntotal)
+    return ids, vectors
+
+class SharedVectorStore(VectorStore):
+    """
+    Vector store shared by several worker processes.
+    Vectors live in append-only FAISS shard files under `<state_dir>/index/`,
+    listed in the shared SQLite database next to the chunk metadata. A write
+    adds one shard with only the new vectors, so its cost does not grow with
+    the corpus. Removed chunks are deleted from SQLite and skipped at search
+    time until their shard is rewritten. Shards of similar size are merged
+    (dropping removed vectors), so each vector is rewritten O(log n) times and
+    a search visits O(log n) shards. Workers memory-map the shards read-only
+    and open only the new ones when the index_version counter changes.
+    """
+    def __init__(self, conn: sqlite3.Connection, state_dir: str, dimension=384, write_conn: sqlite3.Connection = None):
+        self.dimension = dimension
+        # Searches read through `conn` under `_lock`. Writers use their own connection
+        # and lock, so waiting for another worker's write never blocks a search.
+        self.conn = conn
+        self.write_conn = write_conn or open_state_db(conn.execute("PRAGMA database_list").fetchone()[2])
+        self._write_lock = threading.Lock()
+        self.index_dir = os.path.join(state_dir, "index")
+        os.makedirs(self.index_dir, exist_ok=True)
+        # Chunk metadata lives in SQLite; the in-memory columns stay empty
+        self.metadata = ChunkMetadata()
+        # shard_id -> memory-mapped index / removed vectors still inside it
+        self._shards: Dict[int, Any] = {}
+        self._dead: Dict[int, int] = {}
+        self._loaded_version = None
+        self._lock = threading.RLock()
+        self._refresh()
+
+    @property
+    def ntotal(self) -> int:
+        with self._lock:
+            self._refresh()
+            return sum(index.ntotal for index in self._shards.values()) - sum(self._dead.values())
+
+    def _current_version(self) -> int:
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'index_version'").fetchone()
+        return row[0] if row else 0
+
+    def _bump_version(self):
+        self.write_conn.execute(
+            "INSERT INTO meta (key, value) VALUES ('index_version', 1) "
+            "ON CONFLICT(key) DO UPDATE SET value = value + 1"
+        )
+
+    def _open_shard(self, path: str):
+        """
+        Memory-maps a shard read-only; None if a writer has merged it away since.
+        """
+        full_path = os.path.join(self.index_dir, path)
+        try:
+            return faiss.read_index(full_path, MMAP_READ_FLAGS)
+        except RuntimeError:
+            if os.path.exists(full_path):
+                raise
+            return None
+
+    def _refresh(self):
+        """
+        Cheap change notification: one indexed SELECT, reload only on a new version.
+        Shards already open are reused, so a reload costs only the new shards.
+        """
+        if self._current_version() == self._loaded_version:
+            return
+        for _ in range(3):
+            # One read transaction so the version and shard list match
+            self.conn.execute("BEGIN")
+            try:
+                version = self._current_version()
+                rows = self.conn.execute("SELECT shard_id, path, dead FROM index_shards").fetchall()
+            finally:
+                self.conn.execute("COMMIT")
+
+            shards = {
+                shard_id: self._shards[shard_id] if shard_id in self._shards else self._open_shard(path)
+                for shard_id, path, _ in rows
+            }
+            if all(index is not None for index in shards.values()):
+                self._shards = shards
+                self._dead = {shard_id: dead for shard_id, _, dead in rows}
+                self._loaded_version = version
+                return
+        raise RuntimeError("Vector index shards changed while loading; retry the request")
+
+    def _write_shard(self, ids: np.ndarray, vectors: np.ndarray, created: List[str]) -> int:
+        index = _new_index(self.dimension)
+        index.add_with_ids(vectors, ids)
+        shard_id = self.write_conn.execute(
+            "INSERT INTO index_shards (path, vectors, dead) VALUES ('', ?, 0)", (len(ids),)
+        ).lastrowid
+        # Shard ids are never reused, so a file name always means the same contents
+        path = f"shard-{shard_id}.faiss"
+        faiss.write_index(index, os.path.join(self.index_dir, path))
+        created.append(path)
+        self.write_conn.execute("UPDATE index_shards SET path = ? WHERE shard_id = ?", (path, shard_id))
+        return shard_id
+
+    def _rewrite_shards(self, group: List[tuple], created: List[str]) -> List[str]:
+        """
+        Replaces the given shards with one shard holding their live vectors.
+        Returns the file names that become obsolete once committed.
+        """
+        shard_ids = [row[0] for row in group]
+        placeholders = ",".join("?" * len(shard_ids))
+        live = np.array(
+            [position for (position,) in self.write_conn.execute(f"SELECT position FROM chunks WHERE shard IN ({placeholders})", shard_ids)],
+            dtype=np.int64
+        )
+
+        all_ids, all_vectors = [], []
+        for _, path, _, _ in group:
+            ids, vectors = _shard_contents(faiss.read_index(os.path.join(self.index_dir, path)))
+            keep = np.isin(ids, live)
+            all_ids.append(ids[keep])
+            all_vectors.append(vectors[keep])
+
+        merged_id = self._write_shard(np.concatenate(all_ids), np.concatenate(all_vectors), created)
+        self.write_conn.execute(f"UPDATE chunks SET shard = ? WHERE shard IN ({placeholders})", [merged_id, *shard_ids])
+        self.write_conn.execute(f"DELETE FROM index_shards WHERE shard_id IN ({placeholders})", shard_ids)
+        return [row[1] for row in group]
+
+    def _compact_shards(self, created: List[str]) -> List[str]:
+        """
+        Drops empty shards, rewrites mostly-removed ones and merges shards of similar size.
+        """
+        obsolete = []
+        while True:
+            rows = self.write_conn.execute("SELECT shard_id, path, vectors, dead FROM index_shards").fetchall()
+            empty = [row for row in rows if row[3] >= row[2]]
+            if empty:
+                self.write_conn.executemany("DELETE FROM index_shards WHERE shard_id = ?", [(row[0],) for row in empty])
+                obsolete.extend(row[1] for row in empty)
+                continue
+
+            group = next(([row] for row in rows if row[3] * 2 > row[2]), None)
+            if group is None:
+                by_size = sorted(rows, key=lambda row: row[2] - row[3])
+                group = next(
+                    ([a, b] for a, b in zip(by_size, by_size[1:]) if b[2] - b[3] <= SHARD_MERGE_RATIO * (a[2] - a[3])),
+                    None
+                )
+            if group is None:
+                return obsolete
+            obsolete.extend(self._rewrite_shards(group, created))
+
+    def _remove_files(self, paths: List[str]):
+        for path in paths:
+            try:
+                os.remove(os.path.join(self.index_dir, path))
+            except OSError:
+                # Still mapped on platforms that forbid it; left for a later cleanup
+                pass
+
+    def _write(self, remove_ids: List[int], embeddings: np.ndarray, metadata: List[Dict[str, Any]]) -> List[int]:
+        """
+        Applies removals/additions to the shared index. BEGIN IMMEDIATE serializes
+        writers across processes; readers only see the new shards after COMMIT.
+        Only `_write_lock` is held while waiting for it, so searches keep running.
+        """
+        with self._write_lock:
+            created: List[str] = []
+            self.write_conn.execute("BEGIN IMMEDIATE")
+            try:
+                if remove_ids:
+                    placeholders = ",".join("?" * len(remove_ids))
+                    counts = self.write_conn.execute(
+                        f"SELECT shard, COUNT(*) FROM chunks WHERE position IN ({placeholders}) GROUP BY shard", remove_ids
+                    ).fetchall()
+                    self.write_conn.executemany("UPDATE index_shards SET dead = dead + ? WHERE shard_id = ?", [(n, shard) for shard, n in counts])
+                    self.write_conn.execute(f"DELETE FROM chunks WHERE position IN ({placeholders})", remove_ids)
+
+                ids = []
+                if metadata:
+                    row = self.write_conn.execute("SELECT value FROM meta WHERE key = 'next_chunk_id'").fetchone()
+                    start = row[0] if row else 0
+                    ids = list(range(start, start + len(metadata)))
+                    shard_id = self._write_shard(np.array(ids, dtype=np.int64), embeddings, created)
+                    self.write_conn.executemany(
+                        "INSERT INTO chunks (position, document_id, metadata, shard) VALUES (?, ?, ?, ?)",
+                        [(i, m.get("document_id"), json.dumps(m), shard_id) for i, m in zip(ids, metadata)]
+                    )
+                    self.write_conn.execute(
+                        "INSERT INTO meta (key, value) VALUES ('next_chunk_id', ?) "
+                        "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                        (start + len(ids),)
+                    )
+
+                obsolete = self._compact_shards(created)
+                self._bump_version()
+                self.write_conn.execute("COMMIT")
+            except Exception:
+                self.write_conn.execute("ROLLBACK")
+                self._remove_files(created)
+                raise
+            self._remove_files(obsolete)
+        with self._lock:
+            self._refresh()
+        return ids
+
+    @timed("vector_store.add_documents")
+    def add_documents(self, embeddings: np.ndarray, metadata: List[Dict[str, Any]]) -> List[int]:
+        self._check_dimension(embeddings)
+        return self._write([], embeddings, metadata)
+
+    @timed("vector_store.replace_chunks")
+    def replace_chunks(self, remove_ids: List[int], embeddings: np.ndarray = None, metadata: List[Dict[str, Any]] = None) -> List[int]:
+        if metadata:
+            self._check_dimension(embeddings)
+        return self._write(remove_ids, embeddings, metadata)
+
+    def document_chunks(self, document_id: str) -> Dict[int, Dict[str, Any]]:
+        with self._lock:
+            rows = self.conn.execute("SELECT position, metadata FROM chunks WHERE document_id = ?", (document_id,)).fetchall()
+        return {position: json.loads(meta) for position, meta in rows}
+
+    def _lookup_metadata(self, positions: List[int]) -> Dict[int, Dict[str, Any]]:
+        if not positions:
+            return {}
+        placeholders = ",".join("?" * len(positions))
+        rows = self.conn.execute(
+            f"SELECT position, metadata FROM chunks WHERE position IN ({placeholders})", positions
+        ).fetchall()
+        return {position: json.loads(meta) for position, meta in rows}
+
+    def _search_index(self, query: np.ndarray, search_k: int):
+        """
+        Searches every shard, over-fetching by its removed-vector count, and
+        merges the hits by score.
+        """
+        distances, indices = [], []
+        for shard_id, index in self._shards.items():
+            if not index.ntotal:
+                continue
+            d, i = index.search(query, min(search_k + self._dead.get(shard_id, 0), index.ntotal))
+            distances.append(d[0])
+            indices.append(i[0])
+        if not distances:
+            return np.empty((1, 0), dtype=np.float32), np.empty((1, 0), dtype=np.int64)
+
+        distances = np.concatenate(distances)
+        indices = np.concatenate(indices)
+        order = np.argsort(-distances, kind="stable")[:search_k + sum(self._dead.values())]
+        return distances[order][None, :], indices[order][None, :]
+
+    def search(self, query_embedding: np.ndarray, k=5, section_filter: str = None):
+        with self._lock:
+            self._refresh()
+            return super().search(query_embedding, k, section_filter)
@@ -6,13 +6,33 @@ load_dotenv()
 
 from fastapi import FastAPI, Request
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.formparsers import MultiPartParser
 from app.api import routes
+from app.api.limits import BodySizeLimitMiddleware
+from app.api.request_metrics import RequestMetrics
 from app.core.logging_config import logger
+from app.core import metrics
+
+# Per-request stage breakdown in a Server-Timing header: always on when
+# TIMING_HEADERS=true, otherwise opt-in per request via "X-Request-Timing: 1"
+TIMING_HEADERS = os.getenv("TIMING_HEADERS", "false").lower() in ("1", "true", "yes")
+
+# MAX_UPLOAD_SIZE_MB caps the /api/upload request body
+MAX_UPLOAD_BYTES = int(float(os.getenv("MAX_UPLOAD_SIZE_MB", "50")) * 1024 * 1024)
+
+# Starlette's multipart parser keeps each uploaded file in memory up to
+# UPLOAD_SPOOL_MAX_MB and spills it to a temp file (under TMPDIR) beyond that.
+# This is a class attribute, so it applies process-wide to every multipart form.
+MultiPartParser.spool_max_size = int(float(os.getenv("UPLOAD_SPOOL_MAX_MB", "8")) * 1024 * 1024)
 
 app = FastAPI(title="Ultra Doc-Intelligence")
 
+# Reject oversized uploads before Starlette spools the multipart body
+# (added before CORS so 413 responses still carry CORS headers)
+app.add_middleware(BodySizeLimitMiddleware, max_bytes=MAX_UPLOAD_BYTES, paths=["/api/upload"])
+
 # Enable CORS
 app.add_middleware(
     CORSMiddleware,
@@ -34,15 +54,18 @@ async def global_exception_handler(request: Request, exc: Exception):
         }
     )
 
-# Middleware for request logging
-@app.middleware("http")
-async def log_requests(request: Request, call_next):
-    logger.info(f"Incoming: {request.method} {request.url.path}")
-    response = await call_next(request)
-    logger.info(f"Final Status: {response.status_code}")
-    return response
+# Middleware for request logging and metrics
+request_metrics = RequestMetrics(timing_headers=TIMING_HEADERS)
+app.middleware("http")(request_metrics)
 
 app.include_router(routes.router, prefix="/api")
+request_metrics.include_router(routes.router, prefix="/api")
+
+# Plain `def`: gauges read shared state (SQLite) and must not block the event loop
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics_endpoint():
+    return PlainTextResponse(metrics.registry.render(), media_type="text/plain; version=0.0.4")
+
 @app.get("/")
 async def root():
     return "RUNNING"
\ No newline at end of file
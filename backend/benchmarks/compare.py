@@ -0,0 +1,67 @@
+"""
+Compares two benchmark result files produced by benchmarks.run.
+
+Usage (from backend/):
+    python -m benchmarks.compare baseline.json candidate.json --threshold 10
+"""
+import sys
+import json
+import argparse
+from typing import Dict, Any, List
+
+def _key(row: Dict[str, Any]) -> tuple:
+    return (row["stage"], row["doc_type"], row["format"], row["size"])
+
+def compare(baseline: Dict[str, Any], candidate: Dict[str, Any], metric: str = "mean_ms") -> List[Dict[str, Any]]:
+    """
+    Returns per-group deltas (percent change in `metric`, positive = slower).
+    """
+    base_rows = {_key(r): r for r in baseline["summary"]}
+    deltas = []
+    for row in candidate["summary"]:
+        base = base_rows.get(_key(row))
+        if base is None or not base[metric]:
+            continue
+        deltas.append({
+            "stage": row["stage"],
+            "doc_type": row["doc_type"],
+            "format": row["format"],
+            "size": row["size"],
+            "baseline": base[metric],
+            "candidate": row[metric],
+            "change_pct": (row[metric] - base[metric]) / base[metric] * 100,
+        })
+    return deltas
+
+def main(argv: List[str] = None):
+    cli = argparse.ArgumentParser(description="Compare two benchmark runs")
+    cli.add_argument("baseline")
+    cli.add_argument("candidate")
+    cli.add_argument("--metric", default="mean_ms", choices=["mean_ms", "p50_ms", "p95_ms", "max_ms"])
+    cli.add_argument("--threshold", type=float, default=None, help="Exit non-zero if any group regresses by more than this percent")
+    args = cli.parse_args(argv)
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+
+    deltas = compare(baseline, candidate, args.metric)
+    print(f"{'stage':<8} {'type':<18} {'fmt':<5} {'size':>5} {'base':>10} {'cand':>10} {'change':>8}")
+    regressions = 0
+    for d in deltas:
+        flag = ""
+        if args.threshold is not None and d["change_pct"] > args.threshold:
+            flag = "  REGRESSION"
+            regressions += 1
+        print(
+            f"{d['stage']:<8} {d['doc_type']:<18} {d['format']:<5} {d['size']:>5} "
+            f"{d['baseline']:>10.2f} {d['candidate']:>10.2f} {d['change_pct']:>+7.1f}%{flag}"
+        )
+
+    if regressions:
+        print(f"{regressions} group(s) regressed by more than {args.threshold}% ({args.metric})", file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+import json
+import time
+import threading
+import argparse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Canned payloads keyed on the system prompts used by DataExtractor / RAGEngine
+FAKE_SCHEMA = {
+    "carrier_name": "string",
+    "shipper_name": "string",
+    "pickup_date": "string",
+    "delivery_date": "string",
+    "total_amount": "number",
+    "equipment_type": "string",
+}
+FAKE_EXTRACTION = {
+    "carrier_name": "Swift Transport LLC",
+    "shipper_name": "Blue Ridge Logistics",
+    "pickup_date": "2024-03-04",
+    "delivery_date": "2024-03-06",
+    "total_amount": 2450.0,
+    "equipment_type": "53' Dry Van",
+}
+
+def _fake_content(body: dict) -> str:
+    messages = body.get("messages", [])
+    system = " ".join(m.get("content", "") for m in messages if m.get("role") == "system")
+    if "Schema Design" in system:
+        return json.dumps(FAKE_SCHEMA)
+    if "Structured Extraction" in system:
+        return json.dumps(FAKE_EXTRACTION)
+    if (body.get("response_format") or {}).get("type") == "json_object":
+        return json.dumps({"fields": []})
+    return "The carrier is Swift Transport LLC."
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body are separate writes; without TCP_NODELAY, keep-alive
+    # requests stall ~40 ms on delayed ACKs and skew the measured latency
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        length = int(self.headers.get("content-length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send(404, {"error": {"message": f"Unknown path {self.path}"}})
+            return
+
+        if self.server.latency:
+            time.sleep(self.server.latency)
+
+        content = _fake_content(body)
+        prompt_chars = sum(len(m.get("content", "")) for m in body.get("messages", []))
+        with self.server.lock:
+            self.server.request_count += 1
+            request_id = self.server.request_count
+        self._send(200, {
+            "id": f"chatcmpl-fake-{request_id}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "fake"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+                "logprobs": None
+            }],
+            "usage": {
+                # ~4 characters per token is close enough for load accounting
+                "prompt_tokens": prompt_chars // 4,
+                "completion_tokens": len(content) // 4,
+                "total_tokens": prompt_chars // 4 + len(content) // 4
+            }
+        })
+
+    def _send(self, status: int, payload: dict):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+class FakeGroqServer:
+    """
+    Local stand-in for the Groq (OpenAI-compatible) chat completions API.
+    Point the app at it with GROQ_BASE_URL=<server.url>.
+    """
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 0.0):
+        self.httpd = ThreadingHTTPServer((host, port), _Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.latency = latency
+        self.httpd.lock = threading.Lock()
+        self.httpd.request_count = 0
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def request_count(self) -> int:
+        return self.httpd.request_count
+
+    def start(self) -> "FakeGroqServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+if __name__ == "__main__":
+    cli = argparse.ArgumentParser(description="Run a fake Groq-compatible completion server")
+    cli.add_argument("--host", default="127.0.0.1")
+    cli.add_argument("--port", type=int, default=8787)
+    cli.add_argument("--latency", type=float, default=0.0, help="Simulated seconds per completion")
+    args = cli.parse_args()
+    server = FakeGroqServer(args.host, args.port, args.latency)
+    print(f"Fake Groq server listening on {server.url} (set GROQ_BASE_URL to this)")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
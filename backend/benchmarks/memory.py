@@ -0,0 +1,121 @@
+"""
+Memory benchmark for chunk metadata and ParsedItem representations.
+
+Usage (from backend/):
+    python -m benchmarks.memory --chunks 200000 --items 500000 --output bench_memory.json
+
+Compares the previous list-of-dicts chunk metadata against ChunkMetadata, and a
+plain __dict__-based ParsedItem against the __slots__ version, using tracemalloc.
+"""
+import gc
+import sys
+import json
+import random
+import argparse
+import tracemalloc
+from typing import Callable, Dict, Any, List
+
+from app.core.chunk_metadata import ChunkMetadata
+from app.core.chunking import chunk_hash
+from app.core.parsing import ParsedItem
+
+WORDS = ("shipper consignee carrier pickup delivery appointment rate linehaul fuel surcharge "
+         "detention trailer reefer pallets weight liability insurance invoice remit terms "
+         "seal commodity dock warehouse freight tariff accessorial lumper").split()
+SECTIONS = ("header", "parties", "schedule", "rate", "equipment", "terms", "misc")
+
+class LegacyParsedItem:
+    """
+    ParsedItem as it was before __slots__ (per-instance __dict__ and metadata dict).
+    """
+    def __init__(self, type: str, text: str, page_no: int = 1, metadata: Dict[str, Any] = None):
+        self.type = type
+        self.text = text
+        self.page_no = page_no
+        self.metadata = metadata or {}
+
+def _make_chunk(rng: random.Random, i: int, documents: int) -> Dict[str, Any]:
+    chunk = {
+        "text": " ".join(rng.choice(WORDS) for _ in range(rng.randint(20, 60))),
+        "section_type": rng.choice(SECTIONS),
+        "page_number": rng.randint(1, 20),
+        "document_id": f"doc-{i % documents:05d}",
+    }
+    chunk["chunk_hash"] = chunk_hash(chunk)
+    return chunk
+
+def _measure(build: Callable[[], Any]) -> int:
+    """
+    Bytes still allocated after `build` returns (i.e. retained by its result).
+    """
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del result
+    return retained
+
+def bench_chunk_metadata(n: int, documents: int, seed: int) -> Dict[str, Any]:
+    def legacy():
+        rng = random.Random(seed)
+        return [_make_chunk(rng, i, documents) for i in range(n)]
+
+    def compact():
+        rng = random.Random(seed)
+        store = ChunkMetadata()
+        batch = 1000
+        for start in range(0, n, batch):
+            chunks = [_make_chunk(rng, i, documents) for i in range(start, min(start + batch, n))]
+            store.append(range(start, start + len(chunks)), chunks)
+        return store
+
+    legacy_bytes = _measure(legacy)
+    compact_bytes = _measure(compact)
+    return {
+        "count": n,
+        "legacy_bytes": legacy_bytes,
+        "compact_bytes": compact_bytes,
+        "saving_pct": (1 - compact_bytes / legacy_bytes) * 100 if legacy_bytes else 0.0,
+    }
+
+def bench_parsed_items(n: int, seed: int) -> Dict[str, Any]:
+    rng = random.Random(seed)
+    lines = [" ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 12))) for _ in range(n)]
+
+    legacy_bytes = _measure(lambda: [LegacyParsedItem("text", line, i // 50 + 1) for i, line in enumerate(lines)])
+    compact_bytes = _measure(lambda: [ParsedItem("text", line, i // 50 + 1) for i, line in enumerate(lines)])
+    return {
+        "count": n,
+        "legacy_bytes": legacy_bytes,
+        "compact_bytes": compact_bytes,
+        "saving_pct": (1 - compact_bytes / legacy_bytes) * 100 if legacy_bytes else 0.0,
+    }
+
+def main(argv: List[str] = None):
+    cli = argparse.ArgumentParser(description="Measure chunk metadata / ParsedItem memory use")
+    cli.add_argument("--chunks", type=int, default=200000)
+    cli.add_argument("--documents", type=int, default=1000)
+    cli.add_argument("--items", type=int, default=500000)
+    cli.add_argument("--seed", type=int, default=0)
+    cli.add_argument("--output", default="bench_memory.json")
+    args = cli.parse_args(argv)
+
+    results = {
+        "chunk_metadata": bench_chunk_metadata(args.chunks, args.documents, args.seed),
+        "parsed_items": bench_parsed_items(args.items, args.seed),
+    }
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+
+    for name, row in results.items():
+        print(
+            f"{name:<15} n={row['count']:<8} legacy={row['legacy_bytes'] / 2**20:8.1f} MB "
+            f"compact={row['compact_bytes'] / 2**20:8.1f} MB saving={row['saving_pct']:5.1f}%"
+        )
+    print(f"Results written to {args.output}", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+"""
+End-to-end benchmark for the document pipeline.
+
+Usage (from backend/):
+    python -m benchmarks.run --sizes 10 100 --iterations 5 --output bench_results.json
+
+LLM calls go to a local fake Groq server, so no network access is needed as long
+as the embedding model is already in the local Hugging Face cache
+(set HF_HUB_OFFLINE=1 to make sure nothing is downloaded).
+"""
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import statistics
+import subprocess
+from typing import List, Dict, Any
+
+from benchmarks.synthetic_docs import DOC_TYPES, FORMATS, MIME_TYPES, generate_document
+from benchmarks.fake_groq import FakeGroqServer
+from app.core.vector_store import VectorStore
+from app.core.answer_cache import SemanticAnswerCache
+
+QUESTIONS = [
+    "Who is the carrier?",
+    "What is the pickup date?",
+    "What is the total amount?",
+    "What equipment is required?",
+]
+
+def _percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    pos = (len(ordered) - 1) * pct / 100
+    lower = int(pos)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (pos - lower)
+
+def summarize(samples: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Groups raw samples by (stage, doc_type, format, size) into latency/throughput stats.
+    """
+    groups: Dict[tuple, List[Dict[str, Any]]] = {}
+    for s in samples:
+        groups.setdefault((s["stage"], s["doc_type"], s["format"], s["size"]), []).append(s)
+
+    summary = []
+    for (stage, doc_type, fmt, size), group in sorted(groups.items()):
+        seconds = [g["seconds"] for g in group]
+        total = sum(seconds)
+        summary.append({
+            "stage": stage,
+            "doc_type": doc_type,
+            "format": fmt,
+            "size": size,
+            "n": len(seconds),
+            "mean_ms": statistics.mean(seconds) * 1000,
+            "p50_ms": _percentile(seconds, 50) * 1000,
+            "p95_ms": _percentile(seconds, 95) * 1000,
+            "min_ms": min(seconds) * 1000,
+            "max_ms": max(seconds) * 1000,
+            "ops_per_sec": len(seconds) / total if total else 0.0,
+            "items_per_sec": sum(g["items"] for g in group) / total if total else 0.0,
+        })
+    return summary
+
+def _git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], stderr=subprocess.DEVNULL, text=True).strip()
+    except Exception:
+        return "unknown"
+
+def _check_ask_answered(body: Dict[str, Any], question: str, server, llm_calls_before, answer_cache: bool):
+    """
+    Fails the run if an /ask did not go through RAG (refusal shortcut or no LLM
+    call), since its timing would not measure the answer path.
+    """
+    if answer_cache and (body.get("cache") or {}).get("hit"):
+        return
+    status = (body.get("confidence_metrics") or {}).get("status")
+    if status != "accepted":
+        raise RuntimeError(f"/ask for {question!r} was not answered via RAG (status: {status or 'no sources'})")
+    if server is not None and server.request_count == llm_calls_before:
+        raise RuntimeError(f"/ask for {question!r} did not reach the LLM")
+
+def _reset_state(routes):
+    """
+    Fresh in-memory vector store, document store and answer cache, so every
+    iteration searches an index holding only its own document.
+    """
+    routes.vector_store = VectorStore()
+    routes.document_store = {}
+    routes.answer_cache = SemanticAnswerCache(
+        threshold=routes.answer_cache.threshold,
+        max_entries_per_document=routes.answer_cache.max_entries_per_document,
+        max_documents=routes.answer_cache.max_documents
+    )
+
+def run(args) -> Dict[str, Any]:
+    server = None
+    if not args.real_llm:
+        server = FakeGroqServer(latency=args.llm_latency).start()
+        os.environ["GROQ_BASE_URL"] = server.url
+        os.environ["GROQ_API_KEY"] = "benchmark-fake-key"
+
+    # Imported after the environment is set: routes builds its clients at import time
+    from fastapi.testclient import TestClient
+    from app.main import app
+    from app.api import routes
+
+    client = TestClient(app)
+    # Measure the full /ask path unless the answer cache is explicitly under test
+    routes.ANSWER_CACHE_ENABLED = args.answer_cache
+    samples: List[Dict[str, Any]] = []
+
+    def record(stage, doc_type, fmt, size, seconds, items=1):
+        samples.append({"stage": stage, "doc_type": doc_type, "format": fmt, "size": size, "seconds": seconds, "items": items})
+
+    for doc_type in args.doc_types:
+        for fmt in args.formats:
+            for size in args.sizes:
+                filename, data = generate_document(doc_type, fmt, size, args.seed)
+                print(f"[bench] {filename} ({len(data) / 1024:.1f} KB)", file=sys.stderr)
+
+                for i in range(args.warmup + args.iterations):
+                    warm = i < args.warmup
+                    _reset_state(routes)
+
+                    start = time.perf_counter()
+                    parsed = routes.parser.parse(data, filename=filename)
+                    parse_s = time.perf_counter() - start
+
+                    start = time.perf_counter()
+                    chunks = routes.chunker.chunk(parsed)
+                    chunk_s = time.perf_counter() - start
+
+                    texts = [c["text"] for c in chunks]
+                    start = time.perf_counter()
+                    embeddings = routes.embedder.embed(texts)
+                    embed_s = time.perf_counter() - start
+
+                    store = VectorStore(dimension=embeddings.shape[1]) if len(texts) else None
+                    index_s = search_s = 0.0
+                    if store is not None:
+                        start = time.perf_counter()
+                        store.add_documents(embeddings, chunks)
+                        index_s = time.perf_counter() - start
+                        q_embs = routes.embedder.embed(QUESTIONS)
+                        start = time.perf_counter()
+                        for q in q_embs:
+                            store.search(q, k=5)
+                        search_s = time.perf_counter() - start
+
+                    start = time.perf_counter()
+                    resp = client.post("/api/upload", files={"file": (filename, data, MIME_TYPES[fmt])})
+                    upload_s = time.perf_counter() - start
+                    resp.raise_for_status()
+                    document_id = resp.json()["document_id"]
+
+                    ask_times = []
+                    for question in QUESTIONS:
+                        llm_calls = server.request_count if server is not None else None
+                        start = time.perf_counter()
+                        resp = client.post("/api/ask", json={"question": question, "document_id": document_id})
+                        ask_times.append(time.perf_counter() - start)
+                        resp.raise_for_status()
+                        _check_ask_answered(resp.json(), question, server, llm_calls, args.answer_cache)
+
+                    if warm:
+                        continue
+                    record("parse", doc_type, fmt, size, parse_s, len(parsed.items))
+                    record("chunk", doc_type, fmt, size, chunk_s, len(chunks))
+                    record("embed", doc_type, fmt, size, embed_s, len(texts))
+                    if store is not None:
+                        record("index", doc_type, fmt, size, index_s, len(texts))
+                        record("search", doc_type, fmt, size, search_s, len(QUESTIONS))
+                    record("upload", doc_type, fmt, size, upload_s)
+                    for seconds in ask_times:
+                        record("ask", doc_type, fmt, size, seconds)
+
+    if server is not None:
+        server.stop()
+
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "git_commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "llm": "groq" if args.real_llm else f"fake (latency {args.llm_latency}s)",
+            "params": {
+                "doc_types": args.doc_types,
+                "formats": args.formats,
+                "sizes": args.sizes,
+                "iterations": args.iterations,
+                "warmup": args.warmup,
+                "seed": args.seed,
+                "answer_cache": args.answer_cache,
+            },
+        },
+        "summary": summarize(samples),
+        "samples": samples,
+    }
+
+def main(argv: List[str] = None):
+    cli = argparse.ArgumentParser(description="Benchmark parse/chunk/embed/index and /upload, /ask")
+    cli.add_argument("--doc-types", nargs="+", default=list(DOC_TYPES), choices=DOC_TYPES)
+    cli.add_argument("--formats", nargs="+", default=list(FORMATS), choices=FORMATS)
+    cli.add_argument("--sizes", nargs="+", type=int, default=[10, 100], help="Table line items per document")
+    cli.add_argument("--iterations", type=int, default=3)
+    cli.add_argument("--warmup", type=int, default=1)
+    cli.add_argument("--seed", type=int, default=0)
+    cli.add_argument("--llm-latency", type=float, default=0.0, help="Simulated seconds per fake LLM call")
+    cli.add_argument("--real-llm", action="store_true", help="Use the configured Groq endpoint instead of the fake server")
+    cli.add_argument("--answer-cache", action="store_true", help="Keep the /ask answer cache enabled (off by default)")
+    cli.add_argument("--output", default="bench_results.json")
+    args = cli.parse_args(argv)
+
+    results = run(args)
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+
+    print(f"{'stage':<8} {'type':<18} {'fmt':<5} {'size':>5} {'mean ms':>10} {'p95 ms':>10} {'items/s':>10}")
+    for row in results["summary"]:
+        print(
+            f"{row['stage']:<8} {row['doc_type']:<18} {row['format']:<5} {row['size']:>5} "
+            f"{row['mean_ms']:>10.2f} {row['p95_ms']:>10.2f} {row['items_per_sec']:>10.1f}"
+        )
+    print(f"Results written to {args.output}", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+import io
+import random
+from typing import List, Dict, Any, Tuple
+
+DOC_TYPES = ("bol", "rate_confirmation", "invoice")
+FORMATS = ("pdf", "docx", "html")
+
+MIME_TYPES = {
+    "pdf": "application/pdf",
+    "docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    "html": "text/html",
+}
+
+COMPANIES = ["Swift Transport LLC", "Blue Ridge Logistics", "Prairie Freight Co", "Harbor Line Carriers",
+             "Summit Cold Chain", "Lone Star Haulers", "Great Lakes Distribution", "Pacific Crest Foods"]
+CITIES = ["Dallas, TX", "Memphis, TN", "Columbus, OH", "Reno, NV", "Atlanta, GA", "Denver, CO",
+          "Chicago, IL", "Savannah, GA", "Phoenix, AZ", "Kansas City, MO"]
+COMMODITIES = ["Palletized beverages", "Frozen poultry", "Auto parts", "Paper goods", "Steel coils",
+               "Consumer electronics", "Dry groceries", "Building materials"]
+EQUIPMENT = ["53' Dry Van", "53' Reefer", "48' Flatbed", "Step Deck", "26' Box Truck"]
+
+def build_document_content(doc_type: str, line_items: int = 10, seed: int = 0) -> Dict[str, Any]:
+    """
+    Builds format-neutral content for a synthetic logistics document:
+    {"title", "sections": [(heading, [lines])], "table": {"columns", "rows"}}
+    """
+    rng = random.Random(f"{doc_type}-{line_items}-{seed}")
+    shipper, consignee, carrier = rng.sample(COMPANIES, 3)
+    origin, destination = rng.sample(CITIES, 2)
+    ref = rng.randint(100000, 999999)
+    pickup_day = rng.randint(1, 20)
+    equipment = rng.choice(EQUIPMENT)
+
+    parties = [
+        f"Shipper: {shipper}, {origin}.",
+        f"Consignee: {consignee}, {destination}.",
+        f"Carrier: {carrier}, MC# {rng.randint(100000, 999999)}.",
+    ]
+    schedule = [
+        f"Pickup date: 2024-03-{pickup_day:02d} between 08:00 and 12:00 at {origin}.",
+        f"Delivery date: 2024-03-{pickup_day + 2:02d} by appointment at {destination}.",
+    ]
+    terms = [
+        "All freight is subject to the terms and conditions of the governing carrier tariff.",
+        "Carrier liability is limited to the declared value unless otherwise agreed in writing.",
+        "Detention is payable after two free hours at pickup or delivery with signed in and out times.",
+    ]
+
+    if doc_type == "bol":
+        title = "BILL OF LADING"
+        sections = [
+            ("Shipment Details", [f"BOL Number: {ref}.", f"Equipment: {equipment}, seal {rng.randint(1000, 9999)}."]),
+            ("Parties", parties),
+            ("Schedule", schedule),
+            ("Terms and Conditions", terms),
+        ]
+        columns = ["Item", "Description", "Pieces", "Weight (lbs)", "Class"]
+        rows = [
+            [str(i + 1), rng.choice(COMMODITIES), str(rng.randint(1, 40)), str(rng.randint(200, 20000)), str(rng.choice([50, 55, 60, 70, 85, 100]))]
+            for i in range(line_items)
+        ]
+    elif doc_type == "rate_confirmation":
+        title = "RATE CONFIRMATION"
+        amounts = [round(rng.uniform(50, 2500), 2) for _ in range(line_items)]
+        sections = [
+            ("Load Information", [f"Load Number: {ref}.", f"Equipment: {equipment}, commodity {rng.choice(COMMODITIES).lower()}."]),
+            ("Parties", parties),
+            ("Schedule", schedule),
+            ("Rate", [f"Total carrier rate: {sum(amounts):.2f} USD, all inclusive."]),
+            ("Terms and Conditions", terms),
+        ]
+        columns = ["Charge", "Description", "Amount (USD)"]
+        charge_types = ["Linehaul", "Fuel Surcharge", "Detention", "Lumper", "Stop Off", "Tarp"]
+        rows = [[rng.choice(charge_types), f"Charge line {i + 1}", f"{amt:.2f}"] for i, amt in enumerate(amounts)]
+    elif doc_type == "invoice":
+        title = "INVOICE"
+        quantities = [rng.randint(1, 10) for _ in range(line_items)]
+        prices = [round(rng.uniform(25, 900), 2) for _ in range(line_items)]
+        total = sum(q * p for q, p in zip(quantities, prices))
+        sections = [
+            ("Invoice Details", [f"Invoice Number: INV-{ref}.", f"Invoice date: 2024-03-{pickup_day + 5:02d}, payment terms net 30."]),
+            ("Billing", [f"Bill to: {shipper}, {origin}.", f"Remit to: {carrier}, {destination}."]),
+            ("Amount Due", [f"Total amount due: {total:.2f} USD."]),
+            ("Terms and Conditions", terms),
+        ]
+        columns = ["Line", "Description", "Qty", "Unit Price", "Amount"]
+        rows = [
+            [str(i + 1), rng.choice(COMMODITIES), str(q), f"{p:.2f}", f"{q * p:.2f}"]
+            for i, (q, p) in enumerate(zip(quantities, prices))
+        ]
+    else:
+        raise ValueError(f"Unknown document type: {doc_type}")
+
+    return {"title": title, "sections": sections, "table": {"columns": columns, "rows": rows}}
+
+def _pdf_escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+def render_pdf(content: Dict[str, Any]) -> bytes:
+    """
+    Writes a minimal multi-page PDF (Helvetica text, ruled table grid) without
+    third-party dependencies.
+    """
+    width, height, margin = 612, 792, 50
+    line_height, row_height = 14, 16
+    pages: List[List[str]] = [[]]
+    y = height - margin
+
+    def new_page():
+        nonlocal y
+        pages.append([])
+        y = height - margin
+
+    def text(x, size, value, bold=False):
+        font = "F2" if bold else "F1"
+        pages[-1].append(f"BT /{font} {size} Tf {x} {y} Td ({_pdf_escape(value)}) Tj ET")
+
+    text(margin, 16, content["title"], bold=True)
+    y -= line_height * 2
+    for heading, lines in content["sections"]:
+        if y < margin + line_height * (len(lines) + 2):
+            new_page()
+        text(margin, 12, heading, bold=True)
+        y -= line_height
+        for line in lines:
+            text(margin, 10, line)
+            y -= line_height
+        y -= line_height // 2
+
+    columns = content["table"]["columns"]
+    col_width = (width - 2 * margin) / len(columns)
+    max_chars = int(col_width / 5)
+    rows = [columns] + content["table"]["rows"]
+    # Draw the table row by row; each page gets its own ruled grid segment
+    segment_top = y
+    for row in rows:
+        if y - row_height < margin:
+            new_page()
+            segment_top = y
+        top, bottom = y, y - row_height
+        pages[-1].append(f"{margin} {bottom} m {width - margin} {bottom} l S")
+        if top == segment_top:
+            pages[-1].append(f"{margin} {top} m {width - margin} {top} l S")
+        for c in range(len(columns) + 1):
+            x = margin + c * col_width
+            pages[-1].append(f"{x:.1f} {top} m {x:.1f} {bottom} l S")
+        for c, cell in enumerate(row):
+            y = bottom + 4
+            text(f"{margin + c * col_width + 3:.1f}", 9, str(cell)[:max_chars], bold=row is columns)
+        y = bottom
+
+    # Serialize objects: 1 catalog, 2 pages, 3/4 fonts, then (page, content) pairs
+    objects = [
+        None,
+        None,
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold >>",
+    ]
+    kids = []
+    for ops in pages:
+        stream = "\n".join(ops).encode("latin-1", "replace")
+        page_id, content_id = len(objects) + 1, len(objects) + 2
+        kids.append(f"{page_id} 0 R")
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {width} {height}] "
+            f"/Resources << /Font << /F1 3 0 R /F2 4 0 R >> >> /Contents {content_id} 0 R >>".encode()
+        )
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n".encode() + stream + b"\nendstream")
+    objects[0] = b"<< /Type /Catalog /Pages 2 0 R >>"
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>".encode()
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for i, body in enumerate(objects):
+        offsets.append(out.tell())
+        out.write(f"{i + 1} 0 obj\n".encode() + body + b"\nendobj\n")
+    xref = out.tell()
+    out.write(f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode())
+    for offset in offsets:
+        out.write(f"{offset:010d} 00000 n \n".encode())
+    out.write(f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode())
+    return out.getvalue()
+
+def render_docx(content: Dict[str, Any]) -> bytes:
+    import docx
+    doc = docx.Document()
+    doc.add_heading(content["title"], level=1)
+    for heading, lines in content["sections"]:
+        doc.add_heading(heading, level=2)
+        for line in lines:
+            doc.add_paragraph(line)
+
+    columns = content["table"]["columns"]
+    rows = content["table"]["rows"]
+    table = doc.add_table(rows=len(rows) + 1, cols=len(columns))
+    for c, name in enumerate(columns):
+        table.cell(0, c).text = name
+    for r, row in enumerate(rows, start=1):
+        cells = table.rows[r].cells
+        for c, value in enumerate(row):
+            cells[c].text = value
+
+    out = io.BytesIO()
+    doc.save(out)
+    return out.getvalue()
+
+def render_html(content: Dict[str, Any]) -> bytes:
+    from html import escape
+    parts = ["<!DOCTYPE html><html><head><meta charset=\"utf-8\"><title>", escape(content["title"]), "</title></head><body>"]
+    parts.append(f"<h1>{escape(content['title'])}</h1>")
+    for heading, lines in content["sections"]:
+        parts.append(f"<h2>{escape(heading)}</h2>")
+        parts.extend(f"<p>{escape(line)}</p>" for line in lines)
+    parts.append("<table><thead><tr>")
+    parts.extend(f"<th>{escape(c)}</th>" for c in content["table"]["columns"])
+    parts.append("</tr></thead><tbody>")
+    for row in content["table"]["rows"]:
+        parts.append("<tr>" + "".join(f"<td>{escape(v)}</td>" for v in row) + "</tr>")
+    parts.append("</tbody></table></body></html>")
+    return "".join(parts).encode("utf-8")
+
+RENDERERS = {"pdf": render_pdf, "docx": render_docx, "html": render_html}
+
+def generate_document(doc_type: str, fmt: str, line_items: int = 10, seed: int = 0) -> Tuple[str, bytes]:
+    """
+    Returns (filename, file bytes) for a synthetic document.
+    """
+    if fmt not in RENDERERS:
+        raise ValueError(f"Unknown format: {fmt}")
+    content = build_document_content(doc_type, line_items, seed)
+    return f"{doc_type}_{line_items}_{seed}.{fmt}", RENDERERS[fmt](content)
@@ -0,0 +1,59 @@
+import numpy as np
+
+from app.core.answer_cache import SemanticAnswerCache
+
+def _unit(*values):
+    v = np.array(values, dtype=np.float32)
+    return v / np.linalg.norm(v)
+
+PICKUP = ("chunks-1", "pickup_date")
+DELIVERY = ("chunks-1", "delivery_date")
+
+def test_hit_requires_same_context_and_similarity():
+    cache = SemanticAnswerCache(threshold=0.9)
+    cache.store("doc", 1, "What is the pickup date?", _unit(1, 0.1, 0), {"answer": "March 4"}, PICKUP)
+
+    hit = cache.lookup("doc", 1, _unit(1, 0.12, 0), PICKUP)
+    assert hit["answer"] == "March 4"
+    assert hit["cache"]["matched_question"] == "What is the pickup date?"
+
+    # Field-swap question: near-identical embedding, different top schema field
+    assert cache.lookup("doc", 1, _unit(1, 0.1, 0), DELIVERY) is None
+    # Same context but dissimilar question
+    assert cache.lookup("doc", 1, _unit(0, 1, 0), PICKUP) is None
+
+def test_best_match_is_chosen_among_entries_with_the_same_context():
+    cache = SemanticAnswerCache(threshold=0.5)
+    cache.store("doc", 1, "pickup", _unit(1, 0, 0), {"answer": "pickup"}, PICKUP)
+    cache.store("doc", 1, "delivery", _unit(1, 0.01, 0), {"answer": "delivery"}, DELIVERY)
+    cache.store("doc", 1, "pickup time", _unit(0.7, 0.7, 0), {"answer": "pickup time"}, PICKUP)
+
+    assert cache.lookup("doc", 1, _unit(1, 0.01, 0), PICKUP)["answer"] == "pickup"
+    assert cache.lookup("doc", 1, _unit(0.6, 0.8, 0), PICKUP)["answer"] == "pickup time"
+
+def test_revision_change_and_invalidate_drop_entries():
+    cache = SemanticAnswerCache()
+    cache.store("doc", 1, "q", _unit(1, 0), {"answer": "a"}, PICKUP)
+    assert cache.lookup("doc", 2, _unit(1, 0), PICKUP) is None
+    # The stale revision was dropped on lookup
+    assert cache.lookup("doc", 1, _unit(1, 0), PICKUP) is None
+
+    cache.store("doc", 2, "q", _unit(1, 0), {"answer": "a"}, PICKUP)
+    cache.invalidate("doc")
+    assert cache.lookup("doc", 2, _unit(1, 0), PICKUP) is None
+
+def test_cached_responses_are_copies_and_lru_bounded():
+    cache = SemanticAnswerCache(max_entries_per_document=2, max_documents=1)
+    cache.store("doc", 1, "a", _unit(1, 0, 0), {"answer": "a"})
+    cache.lookup("doc", 1, _unit(1, 0, 0))["answer"] = "mutated"
+    assert cache.lookup("doc", 1, _unit(1, 0, 0))["answer"] == "a"
+
+    cache.store("doc", 1, "b", _unit(0, 1, 0), {"answer": "b"})
+    cache.store("doc", 1, "c", _unit(0, 0, 1), {"answer": "c"})
+    # "a" is least recently used once "c" arrives
+    assert cache.lookup("doc", 1, _unit(1, 0, 0)) is None
+    assert cache.lookup("doc", 1, _unit(0, 1, 0))["answer"] == "b"
+    assert cache.lookup("doc", 1, _unit(0, 0, 1))["answer"] == "c"
+
+    cache.store("other", 1, "x", _unit(1, 0, 0), {"answer": "x"})
+    assert cache.lookup("doc", 1, _unit(0, 0, 1)) is None
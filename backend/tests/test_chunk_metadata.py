@@ -0,0 +1,94 @@
+import pytest
+
+from app.core.chunk_metadata import ChunkMetadata
+from app.core.chunking import chunk_hash
+
+def _chunk(i, document_id="doc-a", page_number=1, **extra):
+    chunk = {
+        "text": f"chunk {i} déjà ✓",
+        "section_type": "rate" if i % 2 else "terms",
+        "page_number": page_number,
+        "document_id": document_id,
+        **extra,
+    }
+    chunk["chunk_hash"] = chunk_hash(chunk)
+    return chunk
+
+def _store(n, start=0):
+    store = ChunkMetadata()
+    chunks = [_chunk(i, document_id=f"doc-{i % 3}", page_number=i % 5 + 1) for i in range(start, start + n)]
+    store.append(range(start, start + n), chunks)
+    return store, chunks
+
+def test_get_round_trips_metadata():
+    store, chunks = _store(10)
+    assert len(store) == 10
+    assert store.get(range(10)) == dict(enumerate(chunks))
+
+def test_get_skips_unknown_ids():
+    store, chunks = _store(5, start=10)
+    # Below, between and past the stored ids
+    assert store.get([3, 12, 99, 14]) == {12: chunks[2], 14: chunks[4]}
+    assert store.get([]) == {}
+    assert ChunkMetadata().get([1]) == {}
+
+def test_lookup_works_across_appends_with_gaps():
+    store = ChunkMetadata()
+    store.append([2, 5], [_chunk(2), _chunk(5)])
+    store.append([9, 40], [_chunk(9), _chunk(40)])
+    assert sorted(store.get([0, 5, 6, 40, 41])) == [5, 40]
+
+def test_append_rejects_non_increasing_ids():
+    store, _ = _store(3)
+    with pytest.raises(ValueError):
+        store.append([2], [_chunk(2)])
+
+def test_remove_tombstones_rows():
+    store, chunks = _store(10)
+    store.remove([1, 4, 123])
+    assert len(store) == 8
+    assert sorted(store.get(range(10))) == [0, 2, 3, 5, 6, 7, 8, 9]
+    # Removing again is a no-op
+    store.remove([1])
+    assert len(store) == 8
+
+def test_compaction_preserves_remaining_rows():
+    store = ChunkMetadata()
+    chunks = [_chunk(i, source=f"file-{i}.pdf") if i % 4 == 0 else _chunk(i) for i in range(20)]
+    store.append(range(20), chunks)
+    size_before = store.nbytes()
+
+    removed = [i for i in range(20) if i % 4 != 3]
+    store.remove(removed[:7])
+    # Not yet half the rows: tombstoned only
+    assert store._dead == 7
+    store.remove(removed[7:])
+    assert store._dead == 0
+    assert store._ids.size == 5
+    assert store.nbytes() <= size_before
+
+    kept = [i for i in range(20) if i % 4 == 3]
+    assert store.get(range(20)) == {i: chunks[i] for i in kept}
+    assert list(store.document_chunks("doc-a")) == kept
+
+    # Appends and lookups keep working after compaction
+    store.append([20], [_chunk(20, source="late.pdf")])
+    assert store.get([19, 20]) == {19: chunks[19], 20: _chunk(20, source="late.pdf")}
+
+def test_extra_keys_are_dropped_with_their_row():
+    store = ChunkMetadata()
+    store.append([0, 1], [_chunk(0, source="a.pdf"), _chunk(1, source="b.pdf")])
+    store.remove([0])
+    assert store.get([1])[1]["source"] == "b.pdf"
+    assert 0 not in store._extra
+
+def test_document_chunks_returns_live_rows_of_one_document():
+    store, chunks = _store(9)
+    store.remove([3])
+    assert store.document_chunks("doc-0") == {0: chunks[0], 6: chunks[6]}
+    assert store.document_chunks("missing") == {}
+
+def test_missing_page_number_round_trips_as_none():
+    store = ChunkMetadata()
+    store.append([0, 1, 2], [_chunk(0, page_number=None), _chunk(1, page_number=0), _chunk(2, page_number=7)])
+    assert [store.get([i])[i]["page_number"] for i in range(3)] == [None, 0, 7]
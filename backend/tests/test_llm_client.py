@@ -0,0 +1,215 @@
+import time
+import threading
+
+import httpx
+import pytest
+
+from app.core.llm_client import (
+    LLMClient, LLMError, LLMTimeoutError, LLMResponse, OpenAICompatibleBackend, LLM_HEDGES
+)
+
+class ScriptedBackend:
+    """
+    Backend whose n-th call runs script[n] (an exception to raise, or a callable).
+    Calls beyond the script succeed immediately.
+    """
+    def __init__(self, script=()):
+        self.script = list(script)
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def complete(self, model, messages, timeout, **params):
+        with self._lock:
+            n = len(self.calls)
+            self.calls.append({"model": model, "timeout": timeout, "params": params})
+        step = self.script[n] if n < len(self.script) else None
+        if isinstance(step, Exception):
+            raise step
+        if callable(step):
+            step()
+        return LLMResponse(f"answer {n}", model)
+
+def _client(backend, **kwargs):
+    kwargs.setdefault("backoff_base", 0.001)
+    kwargs.setdefault("backoff_max", 0.001)
+    return LLMClient(backend, **kwargs)
+
+def _retryable(status=503, retry_after=None):
+    return LLMError(f"status {status}", status, retryable=True, retry_after=retry_after)
+
+def test_retries_retryable_errors_then_succeeds():
+    backend = ScriptedBackend([_retryable(), LLMTimeoutError("slow")])
+    response = _client(backend, max_retries=3).complete("m", [])
+    assert response.content == "answer 2"
+    assert len(backend.calls) == 3
+
+def test_non_retryable_error_is_raised_immediately():
+    backend = ScriptedBackend([LLMError("bad request", 400)])
+    with pytest.raises(LLMError) as exc:
+        _client(backend).complete("m", [])
+    assert exc.value.status_code == 400
+    assert len(backend.calls) == 1
+
+def test_gives_up_after_max_retries():
+    backend = ScriptedBackend([_retryable()] * 5)
+    with pytest.raises(LLMError):
+        _client(backend, max_retries=2).complete("m", [])
+    assert len(backend.calls) == 3
+
+def test_retry_after_past_the_deadline_is_not_waited_for():
+    backend = ScriptedBackend([_retryable(429, retry_after=10)])
+    start = time.monotonic()
+    with pytest.raises(LLMError) as exc:
+        _client(backend).complete("m", [], timeout=0.5)
+    assert exc.value.status_code == 429
+    assert time.monotonic() - start < 0.2
+    assert len(backend.calls) == 1
+
+def test_retry_after_is_honoured():
+    backend = ScriptedBackend([_retryable(429, retry_after=0.1)])
+    start = time.monotonic()
+    _client(backend).complete("m", [], timeout=5)
+    assert time.monotonic() - start >= 0.1
+    assert len(backend.calls) == 2
+
+def test_attempt_timeout_is_capped_by_deadline():
+    backend = ScriptedBackend()
+    _client(backend, timeout=30).complete("m", [], timeout=1.0)
+    assert 0 < backend.calls[0]["timeout"] <= 1.0
+
+def test_model_alias_and_params_are_passed_through():
+    backend = ScriptedBackend()
+    response = _client(backend, model_aliases={"m": "local"}).complete("m", [], temperature=0)
+    assert response.model == "local"
+    assert backend.calls[0]["model"] == "local"
+    assert backend.calls[0]["params"] == {"temperature": 0}
+
+def _run_concurrently(client, models):
+    in_flight = {}
+    peak = {}
+    lock = threading.Lock()
+
+    class CountingBackend:
+        def complete(self, model, messages, timeout, **params):
+            with lock:
+                in_flight[model] = in_flight.get(model, 0) + 1
+                in_flight["*"] = in_flight.get("*", 0) + 1
+                for key in (model, "*"):
+                    peak[key] = max(peak.get(key, 0), in_flight[key])
+            time.sleep(0.05)
+            with lock:
+                in_flight[model] -= 1
+                in_flight["*"] -= 1
+            return LLMResponse("ok", model)
+
+    client.backend = CountingBackend()
+    threads = [threading.Thread(target=client.complete, args=(model, [])) for model in models]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return peak
+
+def test_global_concurrency_cap():
+    client = _client(None, max_concurrency=2, max_concurrency_per_model=8)
+    peak = _run_concurrently(client, ["a", "b", "c"] * 3)
+    assert peak["*"] == 2
+
+def test_per_model_concurrency_cap():
+    client = _client(None, max_concurrency=8, max_concurrency_per_model=1)
+    peak = _run_concurrently(client, ["a", "b"] * 4)
+    assert peak["a"] == 1 and peak["b"] == 1
+    assert peak["*"] == 2
+
+def test_calls_queued_on_a_busy_model_do_not_starve_other_models():
+    client = _client(None, max_concurrency=4, max_concurrency_per_model=2)
+    started = {}
+    lock = threading.Lock()
+
+    class RecordingBackend:
+        def complete(self, model, messages, timeout, **params):
+            with lock:
+                started.setdefault(model, time.monotonic())
+            time.sleep(0.2)
+            return LLMResponse("ok", model)
+
+    client.backend = RecordingBackend()
+    # More queued "big" calls than global slots, then one call for another model
+    threads = [threading.Thread(target=client.complete, args=("big", [])) for _ in range(6)]
+    for t in threads:
+        t.start()
+    time.sleep(0.05)
+    start = time.monotonic()
+    small = threading.Thread(target=client.complete, args=("small", []))
+    small.start()
+    for t in threads + [small]:
+        t.join()
+    assert started["small"] - start < 0.1
+
+def test_waiting_for_a_slot_counts_against_the_deadline():
+    release = threading.Event()
+    backend = ScriptedBackend([release.wait])
+    client = _client(backend, max_concurrency=1)
+    holder = threading.Thread(target=client.complete, args=("m", []))
+    holder.start()
+    try:
+        time.sleep(0.05)
+        with pytest.raises(LLMTimeoutError):
+            client.complete("m", [], timeout=0.1)
+    finally:
+        release.set()
+        holder.join()
+
+def test_hedge_returns_the_faster_duplicate():
+    backend = ScriptedBackend([lambda: time.sleep(1.0)])
+    client = _client(backend, hedge_after=0.05)
+    before = LLM_HEDGES._values.get(("m",), 0)
+    start = time.monotonic()
+    response = client.complete("m", [], timeout=5)
+    assert time.monotonic() - start < 0.5
+    assert response.content == "answer 1"
+    assert LLM_HEDGES._values.get(("m",), 0) == before + 1
+
+def test_no_hedge_for_fast_calls():
+    backend = ScriptedBackend()
+    client = _client(backend, hedge_after=0.5)
+    before = LLM_HEDGES._values.get(("m",), 0)
+    assert client.complete("m", []).content == "answer 0"
+    assert len(backend.calls) == 1
+    assert LLM_HEDGES._values.get(("m",), 0) == before
+
+def test_hedge_falls_back_to_second_result_when_first_fails():
+    def slow_failure():
+        time.sleep(0.1)
+        raise LLMError("boom", 400)
+
+    backend = ScriptedBackend([slow_failure])
+    client = _client(backend, hedge_after=0.02, max_retries=0)
+    assert client.complete("m", [], timeout=5).content == "answer 1"
+
+def _openai_backend(handler):
+    backend = OpenAICompatibleBackend("http://llm.test/v1")
+    backend.http_client = httpx.Client(transport=httpx.MockTransport(handler))
+    return backend
+
+def test_openai_backend_maps_status_codes():
+    backend = _openai_backend(lambda request: httpx.Response(429, headers={"Retry-After": "2"}, text="slow down"))
+    with pytest.raises(LLMError) as exc:
+        backend.complete("m", [], timeout=1)
+    assert (exc.value.status_code, exc.value.retryable, exc.value.retry_after) == (429, True, 2.0)
+
+    backend = _openai_backend(lambda request: httpx.Response(400, text="bad"))
+    with pytest.raises(LLMError) as exc:
+        backend.complete("m", [], timeout=1)
+    assert (exc.value.status_code, exc.value.retryable) == (400, False)
+
+def test_openai_backend_maps_timeouts_and_parses_usage():
+    def timeout(request):
+        raise httpx.ReadTimeout("timed out", request=request)
+
+    with pytest.raises(LLMTimeoutError):
+        _openai_backend(timeout).complete("m", [], timeout=1)
+
+    payload = {"choices": [{"message": {"content": "hi"}}], "usage": {"prompt_tokens": 7, "completion_tokens": 2}}
+    response = _openai_backend(lambda request: httpx.Response(200, json=payload)).complete("m", [], timeout=1)
+    assert (response.content, response.usage.prompt_tokens, response.usage.completion_tokens) == ("hi", 7, 2)
@@ -0,0 +1,125 @@
+import time
+
+import pytest
+from fastapi import APIRouter, FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.request_metrics import RequestMetrics
+from app.core import metrics
+from app.core.metrics import MetricsRegistry
+
+def _lines(metric):
+    return [line for line in metric.render() if not line.startswith("#")]
+
+def test_histogram_renders_cumulative_buckets_and_inf():
+    histogram = MetricsRegistry().histogram("latency_seconds", "Latency", ["stage"], buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 3.0):
+        histogram.observe(value, stage="parse")
+
+    assert histogram.render()[:2] == ["# HELP latency_seconds Latency", "# TYPE latency_seconds histogram"]
+    assert _lines(histogram) == [
+        'latency_seconds_bucket{stage="parse",le="0.1"} 1',
+        'latency_seconds_bucket{stage="parse",le="1"} 3',
+        'latency_seconds_bucket{stage="parse",le="+Inf"} 4',
+        'latency_seconds_sum{stage="parse"} 4.05',
+        'latency_seconds_count{stage="parse"} 4',
+    ]
+
+def test_label_values_are_escaped():
+    counter = MetricsRegistry().counter("requests_total", "Requests", ["path"])
+    counter.inc(path='a"b\\c\nd')
+    counter.inc(2, path='a"b\\c\nd')
+    assert _lines(counter) == ['requests_total{path="a\\"b\\\\c\\nd"} 3']
+
+def test_gauge_is_evaluated_at_scrape_time():
+    values = [1]
+    registry = MetricsRegistry()
+    registry.gauge("queue_depth", "Queue depth", lambda: values[-1])
+    values.append(2.5)
+    assert registry.render() == "# HELP queue_depth Queue depth\n# TYPE queue_depth gauge\nqueue_depth 2.5\n"
+
+def test_failing_gauge_is_left_out():
+    registry = MetricsRegistry()
+    registry.gauge("broken", "Broken", lambda: 1 / 0)
+    registry.counter("calls_total", "Calls")
+    assert "broken" not in registry.render()
+
+def _stage_count(stage):
+    prefix = f'ultra_doc_stage_duration_seconds_count{{stage="{stage}"}} '
+    return next((int(line[len(prefix):]) for line in metrics.STAGE_LATENCY.render() if line.startswith(prefix)), 0)
+
+def _stage_errors(stage):
+    prefix = f'ultra_doc_stage_errors_total{{stage="{stage}"}} '
+    return next((int(line[len(prefix):]) for line in metrics.STAGE_ERRORS.render() if line.startswith(prefix)), 0)
+
+def test_track_stage_records_latency_errors_and_request_breakdown():
+    timings = metrics.start_request_timings()
+    with metrics.track_stage("test.sleep"):
+        time.sleep(0.01)
+    with pytest.raises(ValueError):
+        with metrics.track_stage("test.sleep"):
+            raise ValueError("boom")
+
+    assert _stage_count("test.sleep") == 2
+    assert _stage_errors("test.sleep") == 1
+    assert list(timings) == ["test.sleep"]
+    assert timings["test.sleep"] >= 0.01
+
+def test_timed_decorator():
+    @metrics.timed("test.decorated")
+    def work(x):
+        return x * 2
+
+    assert work(21) == 42
+    assert work.__name__ == "work"
+    assert _stage_count("test.decorated") == 1
+
+def test_format_server_timing():
+    header = metrics.format_server_timing({"llm.rag": 0.25, "embed": 0.0012}, 0.3)
+    assert header == "llm_rag;dur=250.0, embed;dur=1.2, total;dur=300.0"
+
+def _make_app(timing_headers=False):
+    router = APIRouter()
+
+    @router.get("/items/{item_id}")
+    def item(item_id: int):
+        with metrics.track_stage("test.item"):
+            return {"item_id": item_id}
+
+    app = FastAPI()
+    request_metrics = RequestMetrics(timing_headers=timing_headers)
+    app.middleware("http")(request_metrics)
+    app.include_router(router, prefix="/api")
+    request_metrics.include_router(router, prefix="/api")
+
+    @app.get("/health")
+    def health():
+        return "ok"
+
+    return app
+
+def _requests(path, status):
+    prefix = f'ultra_doc_http_requests_total{{method="GET",path="{path}",status="{status}"}} '
+    return next((int(line[len(prefix):]) for line in metrics.HTTP_REQUESTS.render() if line.startswith(prefix)), 0)
+
+def test_server_timing_header_is_opt_in_per_request():
+    client = TestClient(_make_app())
+    assert "server-timing" not in client.get("/api/items/1").headers
+
+    header = client.get("/api/items/1", headers={"X-Request-Timing": "1"}).headers["server-timing"]
+    stages = [part.split(";")[0] for part in header.split(", ")]
+    assert stages == ["test_item", "total"]
+
+def test_timing_headers_setting_adds_server_timing_to_every_response():
+    client = TestClient(_make_app(timing_headers=True))
+    assert client.get("/health").headers["server-timing"].startswith("total;dur=")
+
+def test_requests_are_labelled_with_the_mounted_route_template():
+    client = TestClient(_make_app())
+    before = _requests("/api/items/{item_id}", 200), _requests("/health", 200), _requests("unmatched", 404)
+    client.get("/api/items/1")
+    client.get("/api/items/2")
+    client.get("/health")
+    client.get("/nowhere")
+    after = _requests("/api/items/{item_id}", 200), _requests("/health", 200), _requests("unmatched", 404)
+    assert [b - a for a, b in zip(before, after)] == [2, 1, 1]
@@ -0,0 +1,94 @@
+import io
+from types import SimpleNamespace
+
+import pytest
+
+from app.core.parsing import DocumentParser
+
+def _build_pdf(content: bytes) -> bytes:
+    """
+    Minimal one-page PDF with Helvetica and the given content stream.
+    """
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R /Resources << /Font << /F1 5 0 R >> >> >>",
+        b"<< /Length %d >>\nstream\n" % len(content) + content + b"\nendstream",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, obj in enumerate(objects, 1):
+        offsets.append(out.tell())
+        out.write(b"%d 0 obj\n" % number + obj + b"\nendobj\n")
+    xref = out.tell()
+    out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    for offset in offsets:
+        out.write(b"%010d 00000 n \n" % offset)
+    out.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref))
+    return out.getvalue()
+
+def _grid_pdf(operator: str) -> bytes:
+    """
+    2x2 table whose ruling is drawn with straight lines ("l") or Bezier curves ("c").
+    """
+    xs, ys = (100, 250, 400), (700, 670, 640)
+    ops = []
+    for y in ys:
+        segment = f"{xs[-1]} {y} l" if operator == "l" else f"{xs[0] + 50} {y} {xs[-1] - 50} {y} {xs[-1]} {y} c"
+        ops.append(f"{xs[0]} {y} m {segment} S")
+    for x in xs:
+        segment = f"{x} {ys[-1]} l" if operator == "l" else f"{x} {ys[0] - 10} {x} {ys[-1] + 10} {x} {ys[-1]} c"
+        ops.append(f"{x} {ys[0]} m {segment} S")
+    for text, x, y in (("Item", 110, 680), ("Qty", 260, 680), ("Pallets", 110, 650), ("4", 260, 650)):
+        ops.append(f"BT /F1 10 Tf {x} {y} Td ({text}) Tj ET")
+    return _build_pdf("\n".join(ops).encode())
+
+def _page(lines=0, rects=0, curves=0):
+    return SimpleNamespace(lines=[None] * lines, rects=[None] * rects, curves=[None] * curves)
+
+def test_precheck_counts_lines_rects_and_curves():
+    parser = DocumentParser(table_mode="adaptive", table_settings={}, min_table_edges=2)
+    assert not parser._page_may_have_tables(_page())
+    assert not parser._page_may_have_tables(_page(curves=1))
+    assert parser._page_may_have_tables(_page(lines=2))
+    assert parser._page_may_have_tables(_page(rects=1, lines=1))
+    assert parser._page_may_have_tables(_page(curves=2))
+
+def test_precheck_skipped_for_text_strategies_and_always_mode():
+    text_parser = DocumentParser(table_mode="adaptive", table_settings={"vertical_strategy": "text"}, min_table_edges=2)
+    assert text_parser._page_may_have_tables(_page())
+    assert DocumentParser(table_mode="always", table_settings={}, min_table_edges=2)._page_may_have_tables(_page())
+
+def test_tables_ruled_with_lines_or_curves_are_extracted():
+    parser = DocumentParser(table_mode="adaptive", table_settings={}, min_table_edges=2)
+    for operator in ("l", "c"):
+        parsed = parser.parse(_grid_pdf(operator), filename="grid.pdf")
+        assert parsed.page_timings[0]["table_scan"], operator
+        assert parsed.tables.get_tables() == [{"page": 1, "data": [{"Item": "Pallets", "Qty": "4"}]}], operator
+
+def test_pages_without_ruling_skip_table_scan():
+    parser = DocumentParser(table_mode="adaptive", table_settings={}, min_table_edges=2)
+    parsed = parser.parse(_build_pdf(b"BT /F1 10 Tf 100 700 Td (Plain text only) Tj ET"), filename="plain.pdf")
+    assert not parsed.page_timings[0]["table_scan"]
+    assert len(parsed.tables) == 0
+    assert [item.text for item in parsed.items] == ["Plain text only"]
+
+def test_settings_are_read_from_the_environment(monkeypatch):
+    monkeypatch.setenv("PARSER_TABLE_MODE", "Always")
+    monkeypatch.setenv("PARSER_TABLE_SETTINGS", '{"vertical_strategy": "text"}')
+    monkeypatch.setenv("PARSER_MIN_TABLE_EDGES", "4")
+    parser = DocumentParser()
+    assert (parser.table_mode, parser.table_settings, parser.min_table_edges) == ("always", {"vertical_strategy": "text"}, 4)
+
+@pytest.mark.parametrize("name, value", [
+    ("PARSER_TABLE_MODE", "sometimes"),
+    ("PARSER_TABLE_SETTINGS", "{vertical_strategy: text}"),
+    ("PARSER_TABLE_SETTINGS", '["lines"]'),
+    ("PARSER_MIN_TABLE_EDGES", "two"),
+])
+def test_invalid_settings_name_the_variable(monkeypatch, name, value):
+    monkeypatch.setenv(name, value)
+    with pytest.raises(ValueError, match=name):
+        DocumentParser()
@@ -0,0 +1,71 @@
+from app.core.chunking import chunk_hash, diff_chunks
+from app.core.extraction import merge_partial_extraction
+
+def _chunk(text, page=1):
+    chunk = {"text": text, "section_type": "body", "page_number": page}
+    chunk["chunk_hash"] = chunk_hash(chunk)
+    return chunk
+
+def _existing(*chunks, start=0):
+    return {start + i: dict(c) for i, c in enumerate(chunks)}
+
+def test_diff_keeps_unchanged_and_replaces_changed():
+    existing = _existing(_chunk("a"), _chunk("b", 2), _chunk("c", 3))
+    revised = [_chunk("a"), _chunk("B", 2), _chunk("c", 3)]
+    new_chunks, remove_ids = diff_chunks(existing, revised)
+    assert [c["text"] for c in new_chunks] == ["B"]
+    assert remove_ids == [1]
+
+def test_diff_counts_duplicate_chunks():
+    existing = _existing(_chunk("same"), _chunk("same"), _chunk("other"))
+    # One copy dropped: exactly one of the two ids goes
+    new_chunks, remove_ids = diff_chunks(existing, [_chunk("same"), _chunk("other")])
+    assert new_chunks == []
+    assert len(remove_ids) == 1 and remove_ids[0] in (0, 1)
+
+    # One copy added: only the extra copy is new
+    new_chunks, remove_ids = diff_chunks(existing, [_chunk("same")] * 3 + [_chunk("other")])
+    assert [c["text"] for c in new_chunks] == ["same"]
+    assert remove_ids == []
+
+def test_diff_identical_revision_is_a_no_op():
+    chunks = [_chunk("a"), _chunk("b", 2)]
+    assert diff_chunks(_existing(*chunks, start=10), chunks) == ([], [])
+
+def test_diff_same_text_on_another_page_is_a_change():
+    new_chunks, remove_ids = diff_chunks(_existing(_chunk("a", 1)), [_chunk("a", 2)])
+    assert [c["page_number"] for c in new_chunks] == [2]
+    assert remove_ids == [0]
+
+def test_merge_prefers_reextracted_values():
+    merged = merge_partial_extraction({"rate": 1200.0, "carrier": "ACME"}, {"rate": 1350.0, "carrier": None}, "Rate: 1200.00", "Carrier: ACME Freight")
+    assert merged == {"rate": 1350.0, "carrier": "ACME"}
+
+def test_merge_clears_values_whose_source_text_changed():
+    previous = {"rate": 1200.0, "pickup": "Dallas, TX", "po": "PO-77"}
+    # The page holding the rate and PO was rewritten and no longer mentions them
+    merged = merge_partial_extraction(
+        previous, {"rate": None, "po": ""}, "Rate $1,200.00\nPO-77\nPickup: Dallas, TX", "Pickup:  dallas,   tx\n"
+    )
+    assert merged == {"rate": None, "pickup": "Dallas, TX", "po": None}
+
+def test_merge_finds_numbers_in_common_formats():
+    previous = {"rate": 1200, "weight": 42000.5, "pallets": 26}
+    merged = merge_partial_extraction(previous, {"seal": "S-1"}, "Rate $1,200.00 Weight 42,000.50 lbs 26 pallets", "")
+    assert merged == {"rate": None, "weight": None, "pallets": None, "seal": "S-1"}
+
+def test_merge_keeps_reformatted_values_from_untouched_pages():
+    # The LLM normalized the date, so it can't be located; it did not come from the changed page
+    merged = merge_partial_extraction(
+        {"pickup_date": "2024-03-04", "rate": 900}, {"rate": 950}, "Rate: $900", "Pickup: March 4, 2024"
+    )
+    assert merged == {"pickup_date": "2024-03-04", "rate": 950}
+
+def test_merge_treats_a_failed_extraction_as_no_update():
+    previous = {"rate": 1200, "carrier": "ACME"}
+    # extract_structured_data returns {} on any LLM error
+    assert merge_partial_extraction(previous, {}, "Rate 1200 Carrier ACME", "") == previous
+
+def test_merge_keeps_booleans_and_new_fields():
+    merged = merge_partial_extraction({"hazmat": False}, {"seal": "S-1"}, "Hazmat: no", "")
+    assert merged == {"hazmat": False, "seal": "S-1"}
@@ -0,0 +1,76 @@
+import json
+import pickle
+
+import numpy as np
+import pandas as pd
+
+from app.core.table_store import TableStore
+
+def _records(df):
+    return [{k: (None if isinstance(v, float) and np.isnan(v) else v) for k, v in row.items()} for row in df.to_dict(orient="records")]
+
+def test_records_match_dataframe_shape():
+    df = pd.DataFrame({
+        "Item": ["Pallets", "Crates", "Drums", ""],
+        "Qty": [4, 2, 7, 0],
+        "Weight": [1200.5, float("nan"), 300.0, 1.25],
+        "Note": ["fragile", None, "déjà vu ✓", "x"],
+    })
+    store = TableStore()
+    index = store.add(df, page_no=3)
+
+    assert index == 0
+    assert store.records(0) == _records(df)
+    assert store.get_table(0)["page"] == 3
+    # Python scalars (not numpy) so json.dumps works directly
+    assert json.loads(store.to_json()) == [{"page": 3, "data": _records(df)}]
+
+def test_text_columns_use_buffers_not_fixed_width_arrays():
+    df = pd.DataFrame({
+        "Description": ["short"] * 4999 + ["x" * 200],
+        "Code": [f"C{i}" for i in range(5000)],
+    })
+    store = TableStore()
+    store.add(df, page_no=1)
+
+    assert store.nbytes() < df.memory_usage(deep=True).sum()
+    assert store.records(0)[-1]["Description"] == "x" * 200
+
+def test_row_dicts_are_not_cached():
+    store = TableStore()
+    store.add(pd.DataFrame({"A": ["1", "2"]}), page_no=1)
+    assert store.records(0) is not store.records(0)
+    assert store._json_cache is None
+    store.get_tables()
+    assert store._json_cache is None
+
+def test_json_cache_invalidated_on_add_and_not_pickled():
+    store = TableStore()
+    store.add(pd.DataFrame({"A": ["1"]}), page_no=1)
+    first = store.to_json()
+    assert store.to_json() is first
+
+    store.add(pd.DataFrame({"B": [2.5]}), page_no=2)
+    assert json.loads(store.to_json()) == [
+        {"page": 1, "data": [{"A": "1"}]},
+        {"page": 2, "data": [{"B": 2.5}]},
+    ]
+
+    restored = pickle.loads(pickle.dumps(store))
+    assert restored._json_cache is None
+    assert restored.to_json() == store.to_json()
+
+def test_page_filter_and_dataframe_roundtrip():
+    store = TableStore()
+    store.add(pd.DataFrame([["a", "b"]], columns=["", ""]), page_no=1)
+    store.add(pd.DataFrame({"Qty": [1, 2], "Name": ["x", "y"]}), page_no=2)
+    store.add(pd.DataFrame(), page_no=2)
+
+    assert [t["data"] for t in store.get_tables(page=2)] == [[{"Qty": 1, "Name": "x"}, {"Qty": 2, "Name": "y"}], []]
+    assert store.get_tables(page=5) == []
+
+    # Duplicate (blank) header names survive the round trip
+    df = store.to_dataframe(0)
+    assert list(df.columns) == ["", ""]
+    assert df.values.tolist() == [["a", "b"]]
+    pd.testing.assert_frame_equal(store.to_dataframe(1), pd.DataFrame({"Qty": [1, 2], "Name": np.array(["x", "y"], dtype=object)}))
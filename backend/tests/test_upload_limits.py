@@ -0,0 +1,72 @@
+from fastapi import FastAPI, UploadFile, File
+from fastapi.testclient import TestClient
+
+from app.api.limits import BodySizeLimitMiddleware, _format_size
+
+MAX_BYTES = 1024
+BOUNDARY = "testboundary"
+
+def _make_app(calls):
+    app = FastAPI()
+    app.add_middleware(BodySizeLimitMiddleware, max_bytes=MAX_BYTES, paths=["/upload"])
+
+    @app.post("/upload")
+    async def upload(file: UploadFile = File(...)):
+        calls.append(file.filename)
+        return {"size": len(file.file.read())}
+
+    @app.post("/other")
+    async def other(file: UploadFile = File(...)):
+        return {"size": len(file.file.read())}
+
+    return app
+
+def _multipart(payload: bytes) -> bytes:
+    return (
+        f"--{BOUNDARY}\r\n"
+        'Content-Disposition: form-data; name="file"; filename="doc.pdf"\r\n'
+        "Content-Type: application/pdf\r\n\r\n"
+    ).encode() + payload + f"\r\n--{BOUNDARY}--\r\n".encode()
+
+HEADERS = {"content-type": f"multipart/form-data; boundary={BOUNDARY}"}
+
+def test_small_upload_passes_through():
+    calls = []
+    client = TestClient(_make_app(calls))
+    resp = client.post("/upload", content=_multipart(b"x" * 100), headers=HEADERS)
+    assert resp.status_code == 200
+    assert resp.json() == {"size": 100}
+    assert calls == ["doc.pdf"]
+
+def test_declared_oversize_rejected_before_handler():
+    calls = []
+    client = TestClient(_make_app(calls))
+    resp = client.post("/upload", content=_multipart(b"x" * 2048), headers=HEADERS)
+    assert resp.status_code == 413
+    assert resp.json()["detail"] == "File exceeds maximum upload size of 1 KB"
+    assert calls == []
+
+def test_streamed_oversize_rejected_without_content_length():
+    calls = []
+    client = TestClient(_make_app(calls))
+    body = _multipart(b"x" * 4096)
+
+    def chunks():
+        for start in range(0, len(body), 256):
+            yield body[start:start + 256]
+
+    resp = client.post("/upload", content=chunks(), headers=HEADERS)
+    assert resp.status_code == 413
+    assert calls == []
+
+def test_other_paths_are_not_limited():
+    client = TestClient(_make_app([]))
+    resp = client.post("/other", content=_multipart(b"x" * 2048), headers=HEADERS)
+    assert resp.status_code == 200
+    assert resp.json() == {"size": 2048}
+
+def test_limit_in_error_detail_is_not_rounded_down_to_zero():
+    assert _format_size(50 * 1024 * 1024) == "50 MB"
+    assert _format_size(int(1.5 * 1024 * 1024)) == "1.5 MB"
+    assert _format_size(512 * 1024) == "512 KB"
+    assert _format_size(100) == "100 bytes"
@@ -0,0 +1,112 @@
+import os
+import time
+import threading
+
+import numpy as np
+import pytest
+
+from app.core.shared_state import open_state_db
+from app.core.vector_store import VectorStore, SharedVectorStore
+
+DIM = 8
+
+def _vectors(n, seed):
+    rng = np.random.default_rng(seed)
+    v = rng.normal(size=(n, DIM)).astype(np.float32)
+    return v / np.linalg.norm(v, axis=1, keepdims=True)
+
+def _chunks(document_id, n, page=1):
+    return [{"text": f"{document_id} chunk {i}", "document_id": document_id, "section_type": "body", "page_number": page} for i in range(n)]
+
+def _shared(path):
+    return SharedVectorStore(open_state_db(os.path.join(path, "state.db")), str(path), dimension=DIM)
+
+def _shard_count(store):
+    return store.conn.execute("SELECT COUNT(*) FROM index_shards").fetchone()[0]
+
+@pytest.fixture(params=["memory", "shared"])
+def store(request, tmp_path):
+    return VectorStore(dimension=DIM) if request.param == "memory" else _shared(tmp_path)
+
+def test_add_search_and_replace(store):
+    vectors = _vectors(6, 0)
+    ids = store.add_documents(vectors[:3], _chunks("a", 3))
+    store.add_documents(vectors[3:], _chunks("b", 3))
+    assert store.ntotal == 6
+
+    hit = store.search(vectors[1], k=1)[0]
+    assert hit["metadata"]["text"] == "a chunk 1"
+    assert hit["score"] == pytest.approx(1.0, abs=1e-5)
+
+    new_ids = store.replace_chunks([ids[1]], _vectors(1, 9), _chunks("a", 1, page=2))
+    assert new_ids[0] > max(ids)
+    assert store.ntotal == 6
+    assert all(r["metadata"]["text"] != "a chunk 1" or r["metadata"]["page_number"] == 2 for r in store.search(vectors[1], k=6))
+    assert sorted(store.document_chunks("a")) == sorted([ids[0], ids[2], new_ids[0]])
+
+def test_removed_chunks_never_crowd_out_live_results(store):
+    vectors = _vectors(20, 1)
+    ids = store.add_documents(vectors, _chunks("a", 20))
+    # Remove the first four chunks, including the exact match for the query
+    store.replace_chunks(ids[:4])
+    query = vectors[0]
+    results = store.search(query, k=5)
+    assert len(results) == 5
+    assert all(r["metadata"]["text"] not in {f"a chunk {i}" for i in range(4)} for r in results)
+
+def test_workers_see_each_others_writes(tmp_path):
+    first, second = _shared(tmp_path), _shared(tmp_path)
+    vectors = _vectors(4, 2)
+    first.add_documents(vectors[:2], _chunks("a", 2))
+    second.add_documents(vectors[2:], _chunks("b", 2))
+
+    for store in (first, second):
+        assert store.ntotal == 4
+        assert store.search(vectors[3], k=1)[0]["metadata"]["text"] == "b chunk 1"
+        assert store.search(vectors[0], k=1)[0]["metadata"]["text"] == "a chunk 0"
+
+def test_writes_append_shards_and_merge_logarithmically(tmp_path):
+    store = _shared(tmp_path)
+    for n in range(64):
+        store.add_documents(_vectors(4, n), _chunks(f"doc{n}", 4))
+        # Writes never rewrite everything: shard count stays ~log2(n)
+        assert _shard_count(store) <= 8
+
+    assert store.ntotal == 256
+    files = {name for name in os.listdir(store.index_dir)}
+    rows = {path for (path,) in store.conn.execute("SELECT path FROM index_shards")}
+    assert files == rows
+    v = _vectors(4, 37)
+    assert store.search(v[2], k=1)[0]["metadata"]["text"] == "doc37 chunk 2"
+
+def test_mostly_removed_shards_are_compacted(tmp_path):
+    store = _shared(tmp_path)
+    ids = store.add_documents(_vectors(10, 3), _chunks("a", 10))
+    store.replace_chunks(ids[:6])
+    vectors, dead = store.conn.execute("SELECT SUM(vectors), SUM(dead) FROM index_shards").fetchone()
+    assert (vectors, dead) == (4, 0)
+    store.replace_chunks(ids[6:])
+    assert _shard_count(store) == 0
+    assert os.listdir(store.index_dir) == []
+    assert store.search(_vectors(1, 0)[0], k=3) == []
+
+def test_search_does_not_wait_for_a_queued_write(tmp_path):
+    store = _shared(tmp_path)
+    vectors = _vectors(2, 11)
+    store.add_documents(vectors[:1], _chunks("a", 1))
+
+    # Another worker holds the cross-process write lock
+    other = open_state_db(os.path.join(tmp_path, "state.db"))
+    other.execute("BEGIN IMMEDIATE")
+    writer = threading.Thread(target=store.add_documents, args=(vectors[1:], _chunks("b", 1)))
+    writer.start()
+    try:
+        time.sleep(0.1)
+        start = time.perf_counter()
+        assert store.search(vectors[0], k=1)[0]["metadata"]["text"] == "a chunk 0"
+        assert store.ntotal == 1
+        assert time.perf_counter() - start < 1.0
+    finally:
+        other.execute("COMMIT")
+        writer.join()
+    assert store.ntotal == 2